@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from reviews.models import CustomUser
+
+TOKEN_VERSION_KEY = 'auth:token_version:{user_id}'
+# Сколько секунд воркер доверяет закэшированной версии токенов.
+# С общим бэкендом кэша отзыв действует сразу, с локальным — не позже.
+TOKEN_VERSION_TIMEOUT = 60
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя, None — если его нет."""
+    cache = caches[settings.API_CACHE_ALIAS]
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = CustomUser.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        cache.set(key, -1 if version is None else version,
+                  TOKEN_VERSION_TIMEOUT)
+    return None if version == -1 else version
+
+
+def forget_token_version(user_id):
+    caches[settings.API_CACHE_ALIAS].delete(
+        TOKEN_VERSION_KEY.format(user_id=user_id)
+    )
+
+
+class LazyTokenUser(TokenUser):
+    """Пользователь, собранный из утверждений токена.
+
+    Роль и флаги доступа берутся из токена без запроса к базе; строка
+    CustomUser загружается только при обращении к остальным атрибутам.
+    """
+
+    @cached_property
+    def user(self):
+        return CustomUser.objects.get(pk=self.id)
+
+    @cached_property
+    def role(self):
+        return self.claim_or_field('role')
+
+    @cached_property
+    def username(self):
+        return self.claim_or_field('username')
+
+    @cached_property
+    def is_staff(self):
+        return self.claim_or_field('is_staff')
+
+    def claim_or_field(self, name):
+        # Токены, выданные до появления утверждения, читают поле из базы.
+        if name in self.token:
+            return self.token[name]
+        return getattr(self.user, name)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """JWT-аутентификация без чтения пользователя на безопасных запросах.
+
+    Для GET, HEAD и OPTIONS возвращается LazyTokenUser, а действительность
+    токена проверяется по закэшированной версии токенов пользователя.
+    Изменяющие запросы получают настоящую строку CustomUser.
+    """
+
+    def authenticate(self, request):
+        self.safe_request = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.safe_request:
+            user = self.get_token_user(validated_token)
+            current_version = get_token_version(user.id)
+        else:
+            user = super().get_user(validated_token)
+            current_version = user.token_version
+        if current_version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен.',
+                code='user_not_found'
+            )
+        if validated_token.get('token_version', 0) != current_version:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        return user
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('В токене нет идентификатора пользователя.')
+        return LazyTokenUser(validated_token)
@@ -0,0 +1,157 @@
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{group}'
+RESPONSE_KEY = 'api:response:{name}:{versions}:{query}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(*groups):
+    """Возвращает версии групп данных, заводя отсутствующие в кэше.
+
+    Версия — время последнего изменения группы в наносекундах, поэтому
+    после вытеснения из кэша она не повторяет уже выданное значение.
+    """
+    cache = get_cache()
+    keys = {group: VERSION_KEY.format(group=group) for group in groups}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for group, key in keys.items():
+        if key not in stored:
+            stored[key] = time.time_ns()
+            cache.add(key, stored[key], timeout=None)
+        versions[group] = stored[key]
+    return versions
+
+
+def get_query_key(request):
+    """Путь запроса с параметрами в каноническом порядке."""
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return f'{request.path}?{query}'
+
+
+def bump_versions(*groups):
+    """Делает недействительными все ответы, зависящие от групп."""
+    version = time.time_ns()
+    get_cache().set_many(
+        {VERSION_KEY.format(group=group): version for group in groups},
+        timeout=None
+    )
+
+
+class CacheGroupsMixin:
+    """Группы данных, от которых зависят ответы вьюсета.
+
+    cache_groups — всё, что попадает в список; detail_cache_groups —
+    вложенные данные отдельного объекта, кроме его собственной строки.
+    """
+    cache_groups = ()
+    detail_cache_groups = ()
+
+    def get_cache_groups(self):
+        return self.cache_groups
+
+    def get_detail_cache_groups(self):
+        return self.detail_cache_groups
+
+
+class CachedResponseMixin(CacheGroupsMixin):
+    """Кэширует данные ответов list и retrieve вьюсета.
+
+    Ключ включает путь, параметры запроса (фильтры, поиск, страницу) и
+    версии групп данных, которые сдвигаются сигналами из api.signals,
+    так что устаревшие записи просто перестают читаться.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_response_cache_key(self, request):
+        versions = get_versions(*self.get_cache_groups()).values()
+        return RESPONSE_KEY.format(
+            name=self.basename,
+            versions='.'.join(str(version) for version in versions),
+            query=md5(get_query_key(request).encode('utf-8')).hexdigest(),
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return response
+
+
+class ConditionalGetMixin(CacheGroupsMixin):
+    """Отвечает 304 на If-None-Match и If-Modified-Since для list и retrieve.
+
+    Валидаторы списка строятся из версий групп данных, валидаторы объекта —
+    из его updated_at и версий вложенных групп. Ни тело ответа, ни сам
+    объект для этого не сериализуются.
+    """
+
+    def list(self, request, *args, **kwargs):
+        versions = get_versions(*self.get_cache_groups())
+        return self.conditional_response(
+            super().list, versions.values(), request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        updated_at = self.get_object_updated_at()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        versions = get_versions(*self.get_detail_cache_groups())
+        return self.conditional_response(
+            super().retrieve,
+            (int(updated_at.timestamp() * 10 ** 9), *versions.values()),
+            request, *args, **kwargs
+        )
+
+    def get_object_updated_at(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).prefetch_related(None).values_list(
+            'updated_at', flat=True
+        ).first()
+
+    def conditional_response(self, handler, versions, request,
+                             *args, **kwargs):
+        versions = tuple(versions)
+        etag = quote_etag(md5('|'.join((
+            self.basename,
+            request.accepted_renderer.format,
+            get_query_key(request),
+            *(str(version) for version in versions),
+        )).encode('utf-8')).hexdigest())
+        last_modified = max(versions, default=0) // 10 ** 9 or None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
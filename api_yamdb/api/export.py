@@ -0,0 +1,144 @@
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+from reviews.models import Comment, Review, Title
+
+GenreTitle = Title.genre.through
+
+FIELDS = {
+    'titles': (
+        'id', 'name', 'year', 'description', 'category', 'genre', 'rating'
+    ),
+    'reviews': ('id', 'title_id', 'author', 'text', 'score', 'pub_date'),
+    'comments': ('id', 'review_id', 'author', 'text', 'pub_date'),
+}
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+# Сколько строк склеивается в один фрагмент ответа.
+ROWS_PER_CHUNK = 500
+
+
+def title_range(queryset, field, title_min=None, title_max=None):
+    if title_min is not None:
+        queryset = queryset.filter(**{f'{field}__gte': title_min})
+    if title_max is not None:
+        queryset = queryset.filter(**{f'{field}__lte': title_max})
+    return queryset
+
+
+def iter_titles(chunk_size, title_min=None, title_max=None):
+    """Произведения с категорией, жанрами и рейтингом в порядке id.
+
+    Жанры читаются вторым курсором, тоже упорядоченным по id
+    произведения, и сливаются с первым на лету, поэтому в памяти
+    не держится ничего, кроме текущих порций курсоров.
+    """
+    titles = title_range(
+        Title.objects.filter(is_hidden=False).order_by('id'),
+        'id', title_min, title_max
+    ).values_list(
+        'id', 'name', 'year', 'description', 'category__slug',
+        'category__is_hidden', 'rating'
+    ).iterator(chunk_size)
+    genres = title_range(
+        GenreTitle.objects.order_by('title_id', 'genre__slug'),
+        'title_id', title_min, title_max
+    ).values_list('title_id', 'genre__slug').iterator(chunk_size)
+    genre = next(genres, None)
+    for (pk, name, year, description, category, category_hidden,
+         rating) in titles:
+        slugs = []
+        while genre is not None and genre[0] <= pk:
+            if genre[0] == pk:
+                slugs.append(genre[1])
+            genre = next(genres, None)
+        yield {
+            'id': pk,
+            'name': name,
+            'year': year,
+            'description': description,
+            'category': None if category_hidden else category,
+            'genre': slugs,
+            'rating': rating,
+        }
+
+
+def iter_reviews(chunk_size, title_min=None, title_max=None):
+    reviews = title_range(
+        Review.objects.filter(
+            is_hidden=False, title__is_hidden=False
+        ).order_by('id'),
+        'title_id', title_min, title_max
+    ).values_list('id', 'title_id', 'author__username', 'text', 'score',
+                  'pub_date')
+    for row in reviews.iterator(chunk_size):
+        yield dict(zip(FIELDS['reviews'], row))
+
+
+def iter_comments(chunk_size, title_min=None, title_max=None):
+    comments = title_range(
+        Comment.objects.filter(
+            review__is_hidden=False, review__title__is_hidden=False
+        ).order_by('id'),
+        'review__title_id',
+        title_min, title_max
+    ).values_list('id', 'review_id', 'author__username', 'text', 'pub_date')
+    for row in comments.iterator(chunk_size):
+        yield dict(zip(FIELDS['comments'], row))
+
+
+ITERATORS = {
+    'titles': iter_titles,
+    'reviews': iter_reviews,
+    'comments': iter_comments,
+}
+
+
+def encode_ndjson(entity, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def encode_csv(entity, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS[entity])
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        if 'genre' in row:
+            row['genre'] = ','.join(row['genre'])
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+ENCODERS = {
+    'ndjson': encode_ndjson,
+    'csv': encode_csv,
+}
+
+
+def export(entity, file_format, chunk_size=2000,
+           title_min=None, title_max=None):
+    """Потоково выгружает сущность каталога фрагментами текста.
+
+    Строки читаются серверным курсором порциями по chunk_size и
+    отдаются фрагментами по ROWS_PER_CHUNK строк, так что расход памяти
+    не зависит от размера выгрузки.
+    """
+    rows = ITERATORS[entity](chunk_size, title_min, title_max)
+    lines = []
+    for line in ENCODERS[file_format](entity, rows):
+        lines.append(line)
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
@@ -1,5 +1,9 @@
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+
+
+class SlugInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Один или несколько слагов через запятую: ?genre=drama,comedy."""
 
 
 class TitlesFilter(filters.FilterSet):
@@ -7,15 +11,32 @@ class TitlesFilter(filters.FilterSet):
         field_name='name',
         lookup_expr='icontains'
     )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
+    category = SlugInFilter(method='filter_category')
+    genre = SlugInFilter(method='filter_genre')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ['name', 'genre', 'category', 'year']
+
+    def filter_category(self, queryset, name, value):
+        ids = list(Category.objects.filter(
+            slug__in=value, is_hidden=False
+        ).values_list('pk', flat=True))
+        if not ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=ids)
+
+    def filter_genre(self, queryset, name, value):
+        # Слаги превращаются в id одним запросом, а произведения отбираются
+        # подзапросом к промежуточной таблице: он идёт по индексу genre_id
+        # и, в отличие от JOIN, не размножает строки произведений.
+        ids = list(
+            Genre.objects.filter(slug__in=value).values_list('pk', flat=True)
+        )
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=Title.genre.through.objects.filter(
+            genre_id__in=ids
+        ).values('title_id'))
@@ -0,0 +1,250 @@
+import hmac
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+HISTOGRAMS = {
+    'yamdb_request_duration_seconds': (
+        'Время обработки запроса.', LATENCY_BUCKETS
+    ),
+    'yamdb_request_db_queries': (
+        'Число SQL-запросов за запрос.', QUERY_BUCKETS
+    ),
+    'yamdb_response_size_bytes': ('Размер ответа.', SIZE_BUCKETS),
+}
+COUNTERS = {
+    'yamdb_requests_total': 'Число ответов по статусам.',
+    'yamdb_db_duration_seconds_total': 'Время выполнения SQL-запросов.',
+}
+
+
+class Registry:
+    """Метрики процесса с выгрузкой в общий каталог.
+
+    Каждый процесс копит значения в памяти и не чаще раза в
+    METRICS_FLUSH_INTERVAL секунд записывает их в файл <pid>.json
+    каталога METRICS_DIR. /metrics складывает файлы всех воркеров.
+    Без METRICS_DIR отдаются метрики только текущего процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed_at = 0
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        with self.lock:
+            # Счётчики корзин, затем сумма и количество наблюдений.
+            series = self.histograms.get((name, labels))
+            if series is None:
+                series = self.histograms[name, labels] = (
+                    [0] * (len(buckets) + 2)
+                )
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels), list(series)]
+                    for (name, labels), series in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or now - self.flushed_at < (
+            settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed_at = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        # Потоки воркера gthread пишут каждый в свой временный файл.
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as output:
+            json.dump(self.snapshot(), output)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Суммирует метрики всех процессов."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return [self.snapshot()]
+        self.flush(directory)
+        snapshots = []
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, name),
+                          encoding='utf-8') as source:
+                    snapshots.append(json.load(source))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+registry = Registry()
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, series in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            if key not in histograms:
+                histograms[key] = [0] * len(series)
+            for index, value in enumerate(series):
+                histograms[key][index] += value
+    return counters, histograms
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            key, str(value).replace('\\', r'\\').replace('"', r'\"')
+        )
+        for key, value in pairs
+    ) + '}'
+
+
+def render(snapshots):
+    """Метрики в текстовом формате Prometheus."""
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (series_name, labels), value in sorted(counters.items()):
+            if series_name == name:
+                lines.append(f'{name}{format_labels(labels)} {value:g}')
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            total = 0
+            for bound, value in zip(buckets, series):
+                total += value
+                lines.append(
+                    f'{name}_bucket{format_labels(labels, le=f"{bound:g}")} '
+                    f'{total:g}'
+                )
+            lines.append(
+                f'{name}_bucket{format_labels(labels, le="+Inf")} '
+                f'{series[-1]:g}'
+            )
+            lines.append(f'{name}_sum{format_labels(labels)} {series[-2]:g}')
+            lines.append(
+                f'{name}_count{format_labels(labels)} {series[-1]:g}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper: число и суммарное время SQL-запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Собирает задержку, SQL и размер ответа по маршрутам API.
+
+    Маршрут — имя из URLconf (titles-list, review-detail), так что
+    метки не зависят от id в адресе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = (match.url_name or match.route) if match else 'unmatched'
+        labels = (('route', route), ('method', request.method))
+        registry.inc(
+            'yamdb_requests_total',
+            labels + (('status', str(response.status_code)),)
+        )
+        registry.observe('yamdb_request_duration_seconds', labels, duration)
+        registry.observe('yamdb_request_db_queries', labels, timer.count)
+        registry.inc('yamdb_db_duration_seconds_total', labels, timer.duration)
+        if not response.streaming:
+            registry.observe(
+                'yamdb_response_size_bytes', labels, len(response.content)
+            )
+        registry.maybe_flush()
+        return response
+
+
+def metrics_view(request):
+    """Метрики для Prometheus; доступны по токену METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(
+        render(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,230 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Оценка числа строк выборки планировщиком или None.
+
+    На PostgreSQL это Plan Rows из EXPLAIN: для выборки без фильтров
+    планировщик берёт reltuples таблицы, для фильтров — статистику
+    столбцов. Другие базы оценок не дают.
+    """
+    connection = connections[queryset.db]
+    # Срезы вроде подборок лучших малы и считаются точно.
+    if connection.vendor != 'postgresql' or not queryset.query.can_filter():
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedPage(Page):
+    """Страница, наличие следующей за которой известно без count."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который для больших выборок не считает строки.
+
+    Если оценка планировщика не меньше ESTIMATED_COUNT_THRESHOLD, она и
+    становится count, а страницы не ограничиваются оценкой: следующая
+    страница есть, если за текущей нашлась ещё одна строка. Меньшие
+    выборки считаются точно.
+    """
+
+    @cached_property
+    def estimate(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+            return None
+        return estimate
+
+    @property
+    def estimated(self):
+        return self.estimate is not None
+
+    @cached_property
+    def count(self):
+        if self.estimated:
+            return self.estimate
+        return super().count
+
+    def validate_number(self, number):
+        if not self.estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return EstimatedPage(
+            rows[:self.per_page], number, self,
+            has_more=len(rows) > self.per_page
+        )
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Постраничная пагинация с приблизительным count для больших таблиц.
+
+    Включается во вьюсете через pagination_class; поле count_estimated
+    ответа сообщает, что count — оценка, а не точное число.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_estimated', self.page.paginator.estimated),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по паре (pub_date, id), от новых к старым.
+
+    Страница выбирается условием по ключу и LIMIT без COUNT(*) и OFFSET,
+    поэтому её стоимость не зависит от глубины. Курсор непрозрачен для
+    клиента: в нём закодированы направление и ключ граничной записи.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), PageNumberPagination.page_query_param
+        )
+        direction, position = self.decode_cursor(request)
+        self.reverse = direction == 'p'
+        if self.reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def position_filter(self, position):
+        pub_date, pk = position
+        if self.reverse:
+            return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+        return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return 'n', None
+        try:
+            direction, pub_date, pk = urlsafe_b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split('|')
+            position = (parse_datetime(pub_date), int(pk))
+        except (DecodeError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if direction not in ('n', 'p') or position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return direction, position
+
+    def encode_cursor(self, direction, obj):
+        cursor = f'{direction}|{obj.pub_date.isoformat()}|{obj.pk}'
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor('n', self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor('p', self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class PageOrCursorPagination(EstimatedCountPagination):
+    """Постраничная пагинация с переключением в курсорный режим.
+
+    Курсорный режим включается параметром ``?pagination=cursor``
+    (или наличием ``cursor`` в ссылках, которые он возвращает).
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,24 +1,13 @@
 import logging
-import sys
 
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-formatter = logging.Formatter(
-    '%(asctime)s %(levelname)s %(message)s - строка %(lineno)s'
-)
-
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler(sys.stdout)
-logger.addHandler(handler)
-handler.setFormatter(formatter)
-logger.disabled = False
-logger.debug('Логирование из permissions запущено')
 
 
 def admin_or_superuser(request):
     request_user = request.user
-    logger.debug(f'request_user: {request_user}')
+    logger.debug('request_user: %s', request_user)
     is_staff = False
     is_superuser = False
     role = False
@@ -34,16 +23,20 @@ def admin_or_superuser(request):
         role = request_user.role
     except AttributeError:
         pass
-    logger.debug(f'staff: {is_staff}, superuser: {is_superuser}, role: {role}')
+    logger.debug(
+        'staff: %s, superuser: %s, role: %s', is_staff, is_superuser, role
+    )
     return (is_staff or is_superuser or role == 'admin')
 
 
 class IsAdminUserCustom(BasePermission):
     def has_permission(self, request, view):
-        logger.debug(f'dir request: {dir(request)}')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('dir request: %s', dir(request))
         logger.debug('IsAdminUserCustomPermission запущен, уровень запроса.')
-        logger.debug(f'admin_or_superuser: {admin_or_superuser(request)}')
-        return admin_or_superuser(request)
+        allowed = admin_or_superuser(request)
+        logger.debug('admin_or_superuser: %s', allowed)
+        return allowed
 
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
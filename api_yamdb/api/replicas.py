@@ -0,0 +1,85 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import get_cache, get_versions
+
+STICKY_KEY = 'api:primary:{user_id}'
+
+# Реплика, с которой читает текущий запрос; None — основная база.
+current_replica = ContextVar('current_replica', default=None)
+
+
+class ReplicaRouter:
+    """Направляет чтение на реплику, выбранную для текущего запроса.
+
+    Запись и запросы вне ReplicaReadMixin всегда идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+
+def stick_to_primary(user_id):
+    """Следующие REPLICA_STICKY_SECONDS секунд пользователь читает
+    из основной базы и видит свои изменения."""
+    if settings.REPLICA_DATABASES and settings.REPLICA_STICKY_SECONDS:
+        get_cache().set(
+            STICKY_KEY.format(user_id=user_id), True,
+            settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def is_stuck_to_primary(user_id):
+    return bool(get_cache().get(STICKY_KEY.format(user_id=user_id)))
+
+
+class ReplicaReadMixin:
+    """Обслуживает GET и HEAD вьюсета с реплики.
+
+    Запрос остаётся на основной базе, если пользователь недавно что-то
+    менял или если группы данных ответа (см. CacheGroupsMixin) изменились
+    позже чем REPLICA_STICKY_SECONDS назад: отстающая реплика иначе
+    положила бы в кэш старые данные под новой версией.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = current_replica.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            current_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if settings.REPLICA_DATABASES and self.can_read_from_replica(request):
+            current_replica.set(random.choice(settings.REPLICA_DATABASES))
+
+    def can_read_from_replica(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        user = request.user
+        if user.is_authenticated and is_stuck_to_primary(user.id):
+            return False
+        window = settings.REPLICA_STICKY_SECONDS * 10 ** 9
+        versions = get_versions(*self.get_cache_groups()).values()
+        return max(versions, default=0) < time.time_ns() - window
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            stick_to_primary(request.user.id)
+        return super().finalize_response(request, response, *args, **kwargs)
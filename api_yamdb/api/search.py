@@ -0,0 +1,108 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIG = 'russian'
+WORD_RE = re.compile(r'\w+')
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск произведений по названию и описанию.
+
+    На PostgreSQL используется поддерживаемый триггером столбец
+    search_vector с GIN-индексом и триграммное сходство названия, которое
+    находит слова с опечатками. На SQLite запрос идёт в таблицу FTS5
+    reviews_title_fts. Результаты упорядочены по релевантности, поэтому
+    остальные фильтры и пагинация применяются поверх них.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        if connection.vendor == 'postgresql':
+            return self.search_postgresql(queryset, terms)
+        if connection.vendor == 'sqlite':
+            return self.search_sqlite(queryset, terms)
+        return queryset.filter(
+            Q(name__icontains=terms) | Q(description__icontains=terms)
+        )
+
+    def search_postgresql(self, queryset, terms):
+        query = SearchQuery(terms, config=SEARCH_CONFIG)
+        # UPPER(name) совпадает с выражением триграммного индекса.
+        return queryset.annotate(upper_name=Upper('name')).filter(
+            Q(search_vector=query)
+            | Q(upper_name__trigram_similar=terms.upper())
+        ).annotate(
+            search_rank=(
+                SearchRank(F('search_vector'), query)
+                + TrigramSimilarity('name', terms)
+            )
+        ).order_by('-search_rank', 'id')
+
+    def search_sqlite(self, queryset, terms):
+        # Каждое слово ищется как префикс: "войн"* найдёт и «Война».
+        words = WORD_RE.findall(terms)
+        if not words:
+            return queryset.none()
+        match = ' '.join(f'"{word}"*' for word in words)
+        # Таблица FTS5 присоединяется к запросу, а не опрашивается
+        # коррелированным подзапросом: так MATCH выполняется один раз.
+        # bm25 тем меньше, чем релевантнее строка; вес названия выше, как
+        # setweight 'A' против 'B' у описания на PostgreSQL.
+        return queryset.extra(
+            tables=['reviews_title_fts'],
+            where=[
+                'reviews_title_fts.rowid = reviews_title.id',
+                'reviews_title_fts MATCH %s',
+            ],
+            params=[match],
+            select={'search_rank': '-bm25(reviews_title_fts, 10.0, 1.0)'},
+        ).order_by('-search_rank', 'id')
+
+
+def sync_title_index(title):
+    """Обновляет строку произведения в таблице FTS5 на SQLite.
+
+    На PostgreSQL search_vector поддерживает триггер, и ничего делать
+    не нужно.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM reviews_title_fts WHERE rowid = %s', (title.pk,)
+        )
+        cursor.execute(
+            'INSERT INTO reviews_title_fts (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            (title.pk, title.name, title.description)
+        )
+
+
+def drop_title_index(title):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM reviews_title_fts WHERE rowid = %s', (title.pk,)
+        )
+
+
+def rebuild_title_index():
+    """Перестраивает таблицу FTS5 после массовой загрузки на SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM reviews_title_fts')
+        cursor.execute(
+            'INSERT INTO reviews_title_fts (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
@@ -1,30 +1,21 @@
 import logging
 import re
-import sys
 
-from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
+from django.db.models import Q
 from jwt.exceptions import DecodeError
 from rest_framework import exceptions, serializers
-from reviews.models import (ROLE_CHOICES, Category, Comment, CustomUser, Genre,
-                            Review, Title)
+from reviews.leaderboards import trending_score
+from reviews.models import (ROLE_CHOICES, SCORES, Category, Comment,
+                            CustomUser, Genre, Review, Title,
+                            score_count_field)
 
 from .methods import decode
-
-formatter = logging.Formatter(
-    '%(asctime)s %(levelname)s %(message)s - строка %(lineno)s'
-)
+from .sparse import SparseFieldsMixin
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler(sys.stdout)
-logger.addHandler(handler)
-handler.setFormatter(formatter)
-logger.disabled = False
-logger.debug('Логирование из serializers запущено')
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     role = serializers.ChoiceField(choices=ROLE_CHOICES, default='user')
 
     class Meta:
@@ -39,6 +30,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 
 class SignUpSerializer(serializers.ModelSerializer):
+    """Регистрация: занятость username и email проверяется одним запросом."""
 
     class Meta:
         model = CustomUser
@@ -46,41 +38,41 @@ class SignUpSerializer(serializers.ModelSerializer):
             'username',
             'email'
         )
+        # Вместо UniqueValidator на каждое поле — общий запрос в validate.
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
 
     def validate_username(self, value):
-        logger.debug('Валидация username запущена')
-        user = None
-        try:
-            user = CustomUser.objects.get(username=value)
-        except CustomUser.DoesNotExist:
-            pass
-        if user is not None:
-            raise serializers.ValidationError(
-                'У нас уже есть пользователь с таким username.'
-            )
-        logger.debug(f'Validate username: value: {value}')
+        logger.debug('Validate username: value: %s', value)
         match = re.fullmatch(r'^[mM][eE]$', value)
         if match:
             logger.debug(
-                'Зафиксировано недопустимое '
-                f'me-подобное имя пользователя {value}'
+                'Зафиксировано недопустимое me-подобное имя пользователя %s',
+                value
             )
             raise serializers.ValidationError('Недопустимое имя пользователя.')
-        logger.debug(f'Валидация username: {user}')
         return value
 
-    def validate_email(self, value):
-        user = None
-        try:
-            user = CustomUser.objects.get(email=value)
-        except CustomUser.DoesNotExist:
-            pass
-        if user is not None:
-            raise serializers.ValidationError(
-                ('У нас уже есть пользователь с таким email.')
-            )
-        logger.debug(f'Валидация email: {user}')
-        return value
+    def validate(self, data):
+        taken = CustomUser.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        ).values_list('username', 'email')
+        errors = {}
+        for username, email in taken:
+            if username == data['username']:
+                errors['username'] = [
+                    'У нас уже есть пользователь с таким username.'
+                ]
+            if email == data['email']:
+                errors['email'] = [
+                    'У нас уже есть пользователь с таким email.'
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        logger.debug('Валидация username и email пройдена')
+        return data
 
 
 class MyTokenObtainSerializer(serializers.Serializer):
@@ -88,17 +80,18 @@ class MyTokenObtainSerializer(serializers.Serializer):
 
     def validate(self, data):
         ind = self.initial_data
-        logger.debug(self.initial_data)
+        logger.debug('%s', self.initial_data)
         logger.debug('Validation starts...')
-        logger.debug(f'Data to validate: {data}')
+        logger.debug('Data to validate: %s', data)
         if 'username' not in ind:
             raise exceptions.ParseError(
                 'В запросе отсутствует поле "username".'
             )
         username_from_query = ind.get('username')
-        if CustomUser.objects.filter(username=username_from_query).exists():
-            user_object = CustomUser.objects.get(username=username_from_query)
-        else:
+        user_object = CustomUser.objects.filter(
+            username=username_from_query
+        ).first()
+        if user_object is None:
             raise exceptions.NotFound(
                 (f'Пользователь с именем {username_from_query} '
                  'не найден в базе данных.')
@@ -109,7 +102,7 @@ class MyTokenObtainSerializer(serializers.Serializer):
             )
         confirmation_code = ind.get('confirmation_code')
         logger.debug(
-            f'Validation: {username_from_query}:\n {confirmation_code}'
+            'Validation: %s:\n %s', username_from_query, confirmation_code
         )
         try:
             payload = decode(confirmation_code)
@@ -131,15 +124,11 @@ class MyTokenObtainSerializer(serializers.Serializer):
                 'Похоже на подложный код подтверждения.'
             )
 
-        if user_object:
-            token = user_object.token
-            logger.debug(f'Токен из serializers: {token}')
-            data = {'token': token}
-            return data
-        raise serializers.ValidationError(
-            ('Пользователь, обратившийся за токеном, '
-             'отсутствует в базе данных')
-        )
+        # Пользователь нужен TokenView, чтобы не читать его ещё раз.
+        self.user = user_object
+        token = user_object.token
+        logger.debug('Токен из serializers: %s', token)
+        return {'token': token}
 
     def create(self, validated_data):
         if 'email' in self.initial_data:
@@ -148,22 +137,23 @@ class MyTokenObtainSerializer(serializers.Serializer):
             pass
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug', )
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug', )
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
+class TitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = CategorySerializer(source='visible_category', read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
+    sparse_sources = {'category': ('category',)}
 
     class Meta:
         model = Title
@@ -171,9 +161,69 @@ class TitleSerializer(serializers.ModelSerializer):
                   'description', 'genre', 'category')
 
 
-class TitleCreateSerializer(serializers.ModelSerializer):
+SCORE_COUNT_FIELDS = tuple(score_count_field(score) for score in SCORES)
+
+
+def score_histogram(title):
+    """Количество отзывов с каждой оценкой: {'1': 3, ..., '10': 12}."""
+    return {
+        str(score): getattr(title, score_count_field(score))
+        for score in SCORES
+    }
+
+
+class TitleDetailSerializer(TitleSerializer):
+    """Произведение с распределением оценок для диаграммы отзывов."""
+    reviews_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
+    scores = serializers.SerializerMethodField()
+    sparse_sources = {
+        **TitleSerializer.sparse_sources, 'scores': SCORE_COUNT_FIELDS
+    }
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('reviews_count', 'scores')
+
+    def get_scores(self, obj):
+        return score_histogram(obj)
+
+
+class TitleScoresSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    reviews_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
+    scores = serializers.SerializerMethodField()
+    sparse_sources = {'scores': SCORE_COUNT_FIELDS}
+
+    class Meta:
+        model = Title
+        fields = ('id', 'reviews_count', 'scores')
+
+    def get_scores(self, obj):
+        return score_histogram(obj)
+
+
+class LeaderboardTitleSerializer(TitleSerializer):
+    """Произведение подборки с байесовским рейтингом и популярностью."""
+    weighted_rating = serializers.FloatField(
+        source='leaderboard.weighted_rating', read_only=True
+    )
+    trending = serializers.SerializerMethodField()
+    sparse_sources = {
+        **TitleSerializer.sparse_sources, 'trending': ('leaderboard',)
+    }
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('weighted_rating', 'trending')
+
+    def get_trending(self, obj):
+        return round(trending_score(obj.leaderboard.trending), 3)
+
+
+class TitleCreateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(), slug_field='slug'
+        queryset=Category.objects.filter(is_hidden=False), slug_field='slug'
     )
     genre = serializers.SlugRelatedField(
         queryset=Genre.objects.all(), slug_field='slug', many=True
@@ -186,7 +236,7 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -196,22 +246,15 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         fields = ('id', 'text', 'score', 'author', 'pub_date', 'title')
+        read_only_fields = ('title',)
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
-        ):
-            raise ValidationError('Можно оставлять не более одного отзыва!')
-        return data
 
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Комментарий с текстом отзыва в поле review.
 
-class CommentSerializer(serializers.ModelSerializer):
+    С параметром ?review=id вместо текста отзыва отдаётся его id.
+    """
     review = serializers.SlugRelatedField(
         slug_field='text',
         read_only=True
@@ -220,7 +263,21 @@ class CommentSerializer(serializers.ModelSerializer):
         slug_field='username',
         read_only=True
     )
+    review_query_param = 'review'
 
     class Meta:
         fields = ('id', 'author', 'text', 'pub_date', 'review')
         model = Comment
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (
+            'review' in fields
+            and request is not None
+            and request.query_params.get(self.review_query_param) == 'id'
+        ):
+            fields['review'] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+        return fields
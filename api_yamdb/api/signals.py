@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews.models import Category, Comment, Genre, Review, Title
+
+from .cache import bump_versions
+from .search import drop_title_index, sync_title_index
+
+# Какие группы закэшированных ответов и валидаторов зависят от модели:
+# произведения включают категорию и жанры, отзывы меняют рейтинг
+# произведения, а комментарии показывают текст своего отзыва.
+DEPENDENT_GROUPS = {
+    Title: ('titles',),
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Review: ('titles', 'reviews:{instance.title_id}'),
+    Comment: ('comments:{instance.review_id}',),
+}
+
+
+def bump_versions_on_commit(*groups):
+    """Сбрасывает версии групп после фиксации текущей транзакции.
+
+    Иначе параллельный запрос успеет закэшировать под новой версией
+    данные, которых он ещё не видит, и они останутся в кэше до
+    следующей записи. Вне транзакции сброс выполняется сразу.
+    """
+    transaction.on_commit(lambda: bump_versions(*groups))
+
+
+def invalidate_cached_responses(sender, instance, **kwargs):
+    bump_versions_on_commit(*(
+        group.format(instance=instance)
+        for group in DEPENDENT_GROUPS[sender]
+    ))
+
+
+for model in DEPENDENT_GROUPS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        title_ids = {instance.pk}
+    elif pk_set:
+        title_ids = pk_set
+    else:
+        # genre.titles.clear(): затронутые произведения уже неизвестны.
+        bump_versions_on_commit('titles', 'genres')
+        return
+    Title.objects.filter(pk__in=title_ids).update(updated_at=timezone.now())
+    bump_versions_on_commit('titles')
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    sync_title_index(instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    drop_title_index(instance)
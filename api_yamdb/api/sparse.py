@@ -0,0 +1,154 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def get_requested_names(request, param):
+    """Имена полей из параметра вида ?fields=id,name."""
+    return {
+        name.strip()
+        for name in request.query_params.get(param, '').split(',')
+        if name.strip()
+    }
+
+
+class SparseFieldsMixin:
+    """Убирает из ответа поля, не перечисленные в ?fields= или ?exclude=.
+
+    Действует только на корневой сериализатор GET-запроса: вложенные
+    объекты отдаются целиком, а запись проверяет все поля как обычно.
+    sparse_sources сопоставляет поле ответа с атрибутами модели, которые
+    оно читает, если source этого не говорит (свойство, метод).
+    """
+    sparse_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.omitted_fields = {
+            name: fields.pop(name) for name in self.get_omitted_names(fields)
+        }
+        return fields
+
+    def is_sparse_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_omitted_names(self, fields):
+        request = self.context.get('request')
+        if (
+            request is None
+            or request.method not in READ_METHODS
+            or not self.is_sparse_root()
+        ):
+            return set()
+        requested = {
+            param: get_requested_names(request, param)
+            for param in (FIELDS_PARAM, EXCLUDE_PARAM)
+        }
+        errors = {}
+        for param, names in requested.items():
+            unknown = names - set(fields)
+            if unknown:
+                errors[param] = [
+                    f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        omitted = set(requested[EXCLUDE_PARAM])
+        if requested[FIELDS_PARAM]:
+            omitted |= set(fields) - requested[FIELDS_PARAM]
+        return omitted
+
+    def get_field_sources(self, name, field):
+        if name in self.sparse_sources:
+            return set(self.sparse_sources[name])
+        # Убранные поля не привязаны к сериализатору, и source у них
+        # задан, только если указан явно.
+        source = field.source or name
+        if source == '*':
+            return set()
+        return {source.split('.')[0]}
+
+    def get_omitted_sources(self):
+        """Атрибуты модели, которые читают только убранные поля."""
+        kept = set()
+        for name, field in self.fields.items():
+            kept |= self.get_field_sources(name, field)
+        omitted = set()
+        for name, field in self.omitted_fields.items():
+            omitted |= self.get_field_sources(name, field)
+        return omitted - kept
+
+
+def get_related_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        path = prefix + name
+        if subtree:
+            yield from get_related_paths(subtree, path + LOOKUP_SEP)
+        else:
+            yield path
+
+
+def prune_queryset(queryset, names):
+    """Не читает поля модели из names и не загружает связи с этими именами.
+
+    Столбцы внешних ключей остаются: по ним менеджер связи подставляет
+    уже известный объект (comment.review) без отдельного запроса.
+    """
+    opts = queryset.model._meta
+    deferred, relations = [], set()
+    for name in names:
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.is_relation:
+            relations.add(name)
+        elif field.concrete and not field.primary_key:
+            deferred.append(name)
+    if relations:
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            kept = [
+                path for path in get_related_paths(select_related)
+                if path.split(LOOKUP_SEP)[0] not in relations
+            ]
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*kept)
+        lookups = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_to', lookup).split(LOOKUP_SEP)[0]
+            not in relations
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    return queryset
+
+
+class SparseQuerysetMixin:
+    """Сужает запрос вьюсета под поля ответа из ?fields= и ?exclude=.
+
+    sparse_required — поля модели, которые нужны вьюсету независимо от
+    ответа, например для курсора пагинации.
+    """
+    sparse_required = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in READ_METHODS:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsMixin):
+            return queryset
+        names = serializer.get_omitted_sources() - set(self.sparse_required)
+        if not names:
+            return queryset
+        return prune_queryset(queryset, names)
@@ -0,0 +1,48 @@
+from collections.abc import Mapping
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalCacheThrottle(SimpleRateThrottle):
+    """Счётчики запросов в отдельном кэше THROTTLE_CACHE_ALIAS.
+
+    Локальный кэш не ходит ни в базу, ни в сеть, поэтому даже поток
+    отклонённых запросов не нагружает базу данных. Лимит действует на
+    каждый процесс gunicorn отдельно.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+class AuthIPThrottle(LocalCacheThrottle):
+    """Ограничивает регистрацию и выдачу токена с одного IP-адреса."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class AuthUsernameThrottle(LocalCacheThrottle):
+    """Ограничивает попытки для одного username с любых адресов."""
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        # Тело-список или скаляр отклонит сериализатор; такие запросы
+        # ограничивает только AuthIPThrottle.
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': md5(username.lower().encode('utf-8')).hexdigest(),
+        }
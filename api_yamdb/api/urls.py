@@ -1,10 +1,10 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
 from .routers import CustomRouter
 from .views import (APISignupView, CategoryViewSet, CommentViewSet,
-                    GenreViewSet, ReviewViewSet, TitleViewSet, TokenView,
-                    UserViewSet)
+                    ExportView, GenreViewSet, ReviewViewSet, TitleViewSet,
+                    TokenView, UserViewSet)
 
 router_v1_a = CustomRouter()
 router_v1_a.register(r'users', UserViewSet)
@@ -22,7 +22,13 @@ router_v1_b.register(
 
 urlpatterns = [
     path('v1/', include(router_v1_a.urls)),
-    path('v1/auth/signup/', APISignupView.as_view()),
-    path('v1/auth/token/', TokenView.as_view()),
+    path('v1/auth/signup/', APISignupView.as_view(), name='signup'),
+    path('v1/auth/token/', TokenView.as_view(), name='token'),
+    re_path(
+        r'^v1/export/(?P<entity>titles|reviews|comments)'
+        r'\.(?P<extension>ndjson|csv)$',
+        ExportView.as_view(),
+        name='export'
+    ),
     path('v1/', include(router_v1_b.urls)),
 ]
@@ -1,50 +1,83 @@
 import logging
-import sys
+from collections.abc import Mapping
+from contextlib import nullcontext
 
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
-from reviews.models import Category, CustomUser, Genre, Review, Title
+from reviews.leaderboards import trending_threshold
+from reviews.models import (Category, CustomUser, Genre, OutgoingEmail,
+                            Review, Title)
 
+from .authentication import forget_token_version
+from .cache import CachedResponseMixin, ConditionalGetMixin
+from .export import CONTENT_TYPES, export
 from .filters import TitlesFilter
 from .methods import get_user_role
+from .pagination import EstimatedCountPagination, PageOrCursorPagination
 from .permissions import (IsAdminModeratorUserPermission, IsAdminOrReadOnly,
                           IsAdminUserCustom)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          CustomUserSerializer, GenreSerializer,
+from .replicas import ReplicaReadMixin, stick_to_primary
+from .search import TitleSearchFilter
+from .serializers import (SCORE_COUNT_FIELDS, CategorySerializer,
+                          CommentSerializer, CustomUserSerializer,
+                          GenreSerializer, LeaderboardTitleSerializer,
                           MyTokenObtainSerializer, ReviewSerializer,
                           SignUpSerializer, TitleCreateSerializer,
+                          TitleDetailSerializer, TitleScoresSerializer,
                           TitleSerializer)
+from .sparse import SparseQuerysetMixin
+from .throttling import AuthIPThrottle, AuthUsernameThrottle
 
-formatter = logging.Formatter(
-    '%(asctime)s %(levelname)s %(message)s - строка %(lineno)s'
-)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler(sys.stdout)
-logger.addHandler(handler)
-handler.setFormatter(formatter)
-logger.disabled = False
-logger.debug('Логирование из views запущено')
 
-
-class UserViewSet(viewsets.ModelViewSet):
+# Сколько произведений можно запросить в /titles/scores/ за раз.
+SCORES_BATCH_SIZE = 100
+# Произведения, у которых затухающее число отзывов меньше этого,
+# в подборку популярных не попадают.
+TRENDING_MIN_SCORE = 0.01
+
+
+def save_or_400(serializer, message, **kwargs):
+    """Сохраняет объект, отвечая 400 на нарушение ограничений базы.
+
+    Уникальность и существование связанных строк проверяет сама база
+    при INSERT, без отдельных SELECT и без гонки между проверкой и
+    записью. Внутри внешней транзакции неудавшийся INSERT откатывается
+    до точки сохранения; в режиме autocommit она не нужна.
+    """
+    if transaction.get_connection().in_atomic_block:
+        savepoint = transaction.atomic()
+    else:
+        savepoint = nullcontext()
+    try:
+        with savepoint:
+            serializer.save(**kwargs)
+    except IntegrityError:
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+    pagination_class = EstimatedCountPagination
     lookup_field = 'username'
     trailing_slash = '/'
 
     def get_permissions(self):
         if 'getme' in self.action_map.values():
             logger.debug('Запущен эндпойнт me')
-            logger.debug(self.request.auth)
             return (permissions.IsAuthenticated(),)
         if self.suffix == 'users-list' or 'user-detail':
             logger.debug('Запущен эндпойнт users-list или user-detail')
@@ -55,17 +88,18 @@ class UserViewSet(viewsets.ModelViewSet):
     def getme(self, request):
         request_user = request.user
         custom_user = CustomUser.objects.get(username=request_user.username)
-        logger.debug(request.auth)
+        logger.debug('%s', request.auth)
 
         if request.method == 'GET':
             serializer = self.get_serializer(custom_user)
             logger.debug('Зафиксирован метод GET')
-            logger.debug(dir(request))
-            logger.debug(dir(self))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('request: %s', dir(request))
+                logger.debug('view: %s', dir(self))
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == 'PATCH':
             request_user_role = get_user_role(request.auth)
-            logger.debug(f'User role: {request_user_role}')
+            logger.debug('User role: %s', request_user_role)
             rd = request.data.copy()
             if 'role' in rd:
                 del rd['role']
@@ -82,8 +116,8 @@ class UserViewSet(viewsets.ModelViewSet):
                     confirmation_code = user.confirmation_code
                     # при запуске в производство поставить отправку по почте
                     logger.debug(
-                        f'Объект {username}\n Его новый '
-                        f'confirmation_code:{confirmation_code}.'
+                        'Объект %s\n Его новый confirmation_code:%s.',
+                        username, confirmation_code
                     )
                 return Response(serializer.data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_200_OK)
@@ -112,20 +146,29 @@ class UserViewSet(viewsets.ModelViewSet):
             confirmation_code = user.confirmation_code
             # при запуске в производство поставить отправку по почте
             logger.debug(
-                f'Объект {username}\n Его новый '
-                f'confirmation_code:{confirmation_code}.'
+                'Объект %s\n Его новый confirmation_code:%s.',
+                username, confirmation_code
             )
 
 
 class APISignupView(APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
 
+    @transaction.atomic
     def post(self, request):
-        logger.debug(request.data)
+        logger.debug('%s', request.data)
         serializer = SignUpSerializer(data=request.data)
         if serializer.is_valid():
             logger.debug('Валидация APISignupView пройдена')
-            serializer.save(is_active=False)
+            try:
+                serializer.save(is_active=False)
+            except IntegrityError:
+                # Параллельная регистрация с теми же данными опередила
+                # эту: транзакция запроса откатывается целиком.
+                raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                    'У нас уже есть пользователь с таким username или email.'
+                ]})
             user = serializer.instance
             rd = request.data
             username = rd.get('username')
@@ -142,15 +185,14 @@ class APISignupView(APIView):
                 f'по ключу "confirmation_code".'
             )
             mail_from = 'orel333app@gmail.com'
-            mail_to = [email]
-            send_mail(
-                mail_theme,
-                mail_text,
-                mail_from,
-                mail_to,
-                fail_silently=False
+            # Письмо отправит команда send_outbox: ответ не ждёт SMTP.
+            OutgoingEmail.objects.create(
+                subject=mail_theme,
+                body=mail_text,
+                from_email=mail_from,
+                to=email
             )
-            logger.debug(confirmation_code)
+            logger.debug('%s', confirmation_code)
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -158,29 +200,50 @@ class APISignupView(APIView):
 
 class TokenView(TokenObtainPairView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthIPThrottle, AuthUsernameThrottle)
 
     def post(self, request):
+        if not isinstance(request.data, Mapping):
+            raise ParseError(
+                'Ожидается объект с полями username и confirmation_code.'
+            )
         rd = request.data.copy()
-        logger.debug(f'View: request.data: {rd}')
+        logger.debug('View: request.data: %s', rd)
         serializer = MyTokenObtainSerializer(data=rd)
         if serializer.is_valid():
             logger.debug('Serializer is valid')
-            username = rd.get('username')
-            user = get_object_or_404(CustomUser, username=username)
-            user.is_active = True
-            user.save()
+            user = serializer.user
+            if not user.is_active:
+                # Повторная выдача токена ничего не пишет в базу.
+                CustomUser.objects.filter(pk=user.pk).update(is_active=True)
+                forget_token_version(user.pk)
+                stick_to_primary(user.pk)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_404_NOT_FOUND)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
+class HideOnDestroyMixin:
+    """DELETE только скрывает объект (см. reviews.models.HideableModel).
+
+    Каскад по зависимым строкам может быть долгим, поэтому его порциями
+    выполняет команда purge_hidden, а запрос отвечает сразу.
+    """
+
+    def perform_destroy(self, instance):
+        instance.hide()
+
+
+class CategoryViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                      CachedResponseMixin, HideOnDestroyMixin,
+                      SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Category.objects.filter(is_hidden=False)
     serializer_class = CategorySerializer
     pagination_class = PageNumberPagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['name', ]
     lookup_field = 'slug'
+    cache_groups = ('categories',)
 
     def retrieve(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -189,7 +252,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                   CachedResponseMixin, SparseQuerysetMixin,
+                   viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     pagination_class = PageNumberPagination
@@ -197,6 +262,7 @@ class GenreViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['name', ]
     lookup_field = 'slug'
+    cache_groups = ('genres',)
 
     def retrieve(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -205,54 +271,194 @@ class GenreViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all()
-    pagination_class = PageNumberPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+class TitleViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                   CachedResponseMixin, HideOnDestroyMixin,
+                   SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.filter(is_hidden=False).select_related(
+        'category'
+    ).prefetch_related('genre').defer('search_vector').order_by('id')
+    pagination_class = EstimatedCountPagination
+    filter_backends = [DjangoFilterBackend, TitleSearchFilter]
     filterset_class = TitlesFilter
     permission_classes = (IsAdminOrReadOnly,)
+    cache_groups = ('titles', 'categories', 'genres')
+    detail_cache_groups = ('categories', 'genres')
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('top', 'trending'):
+            return LeaderboardTitleSerializer
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
+        if self.action == 'list':
             return TitleSerializer
         return TitleCreateSerializer
 
+    def get_leaderboard_queryset(self):
+        return self.get_queryset().select_related('leaderboard')
+
+    def leaderboard_response(self, queryset):
+        # Подборка ограничена LEADERBOARD_SIZE местами: счётчик страниц
+        # тогда читает начало индекса, а не всю таблицу.
+        queryset = self.filter_queryset(queryset)[:settings.LEADERBOARD_SIZE]
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, filter_backends=[])
+    def scores(self, request):
+        """Распределения оценок произведений из ?ids=1,2,3 одним запросом.
+
+        Читаются только счётчики строк произведений; отсутствующие id
+        в ответ не попадают.
+        """
+        ids = request.query_params.get('ids', '').split(',')
+        try:
+            ids = {int(title_id) for title_id in ids if title_id.strip()}
+        except ValueError:
+            raise ValidationError(
+                {'ids': ['Укажите id произведений через запятую.']}
+            )
+        if not 0 < len(ids) <= SCORES_BATCH_SIZE:
+            raise ValidationError({'ids': [
+                f'Укажите от 1 до {SCORES_BATCH_SIZE} id произведений.'
+            ]})
+        return self.cached_response(
+            lambda request: Response(TitleScoresSerializer(
+                Title.objects.filter(pk__in=ids, is_hidden=False).only(
+                    'pk', 'rating_count', *SCORE_COUNT_FIELDS
+                ).order_by('pk'),
+                many=True,
+                context=self.get_serializer_context()
+            ).data),
+            request
+        )
+
+    @action(detail=False, filter_backends=[DjangoFilterBackend])
+    def top(self, request):
+        """Лучшие произведения по байесовскому среднему оценок.
+
+        Фильтруются по category и genre, как и список произведений.
+        """
+        return self.cached_response(
+            lambda request: self.leaderboard_response(
+                self.get_leaderboard_queryset().filter(
+                    leaderboard__weighted_rating__isnull=False
+                ).order_by('-leaderboard__weighted_rating', 'pk')
+            ),
+            request
+        )
+
+    @action(detail=False, filter_backends=[DjangoFilterBackend])
+    def trending(self, request):
+        """Популярные произведения по числу недавних отзывов."""
+        return self.cached_response(
+            lambda request: self.leaderboard_response(
+                self.get_leaderboard_queryset().filter(
+                    leaderboard__trending__gte=trending_threshold(
+                        TRENDING_MIN_SCORE
+                    )
+                ).order_by('-leaderboard__trending', 'pk')
+            ),
+            request
+        )
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                    HideOnDestroyMixin, SparseQuerysetMixin,
+                    viewsets.ModelViewSet):
     """Пользователи оставляют к произведениям текстовые отзывы."""
     serializer_class = ReviewSerializer
+    pagination_class = PageOrCursorPagination
     permission_classes = (IsAdminModeratorUserPermission,)
+    # Курсор пагинации строится по pub_date последнего отзыва страницы.
+    sparse_required = ('pub_date',)
+
+    def get_cache_groups(self):
+        return (f'reviews:{self.kwargs.get("title_id")}',)
+
+    @cached_property
+    def title(self):
+        """Произведение из адреса; читается один раз за запрос."""
+        return get_object_or_404(
+            Title, id=self.kwargs.get('title_id'), is_hidden=False
+        )
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Title.objects.none()
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.title.reviews.filter(
+            is_hidden=False
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Повторный отзыв отклоняет ограничение unique_review.
+        save_or_400(
+            serializer, 'Можно оставлять не более одного отзыва!',
+            author=self.request.user, title=self.title
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                     SparseQuerysetMixin, viewsets.ModelViewSet):
     """Пользователи оставляют коментарии к отзывам."""
     serializer_class = CommentSerializer
+    pagination_class = PageOrCursorPagination
     permission_classes = (IsAdminModeratorUserPermission,)
+    sparse_required = ('pub_date',)
 
-    def get_queryset(self):
-        review = get_object_or_404(
+    def get_cache_groups(self):
+        return (
+            f'comments:{self.kwargs.get("review_id")}',
+            *self.get_detail_cache_groups(),
+        )
+
+    def get_detail_cache_groups(self):
+        return (f'reviews:{self.kwargs.get("title_id")}',)
+
+    @cached_property
+    def review(self):
+        """Отзыв из адреса; читается один раз за запрос."""
+        return get_object_or_404(
             Review,
             id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
+            title__id=self.kwargs.get('title_id'),
+            is_hidden=False,
+            title__is_hidden=False
         )
-        return review.comments.all()
+
+    def get_queryset(self):
+        # comment.review берётся из self.review без запросов, author — JOIN.
+        return self.review.comments.select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            title_id=self.kwargs.get('title_id'),
-            id=self.kwargs.get('review_id')
+        save_or_400(
+            serializer, 'Отзыв удалён, комментарий не сохранён.',
+            author=self.request.user, review=self.review
+        )
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка каталога для администраторов.
+
+    /export/titles.ndjson, /export/reviews.csv и т. д.; параметры
+    title_min и title_max ограничивают диапазон id произведений.
+    """
+    permission_classes = (IsAdminUserCustom,)
+
+    def get(self, request, entity, extension):
+        bounds = {}
+        for name in ('title_min', 'title_max'):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            if not value.isdigit():
+                raise ValidationError({name: 'Ожидается целое число.'})
+            bounds[name] = int(value)
+        response = StreamingHttpResponse(
+            export(entity, extension, **bounds),
+            content_type=CONTENT_TYPES[extension]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{entity}.{extension}"'
         )
-        serializer.save(author=self.request.user, review=review)
+        return response
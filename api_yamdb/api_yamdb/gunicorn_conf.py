@@ -0,0 +1,22 @@
+"""Настройки gunicorn: gunicorn -c python:api_yamdb.gunicorn_conf.
+
+Воркеры gthread обслуживают несколько запросов в потоках одного
+процесса: пока поток ждёт базу данных, остальные отвечают на запросы.
+У каждого потока своё соединение с базой, так что одновременно открыто
+до GUNICORN_WORKERS * GUNICORN_THREADS соединений.
+
+По умолчанию процесс один: кэш 'api' (ответы, версии групп данных,
+версии токенов, привязка к основной базе) — LocMemCache отдельного
+процесса. Несколько воркеров требуют общего бэкенда API_CACHE_BACKEND,
+иначе изменение, сделанное в одном воркере, не видно остальным.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', default=1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', default='gthread')
+# При threads > 1 gunicorn заменяет воркер sync на gthread.
+threads = int(os.getenv(
+    'GUNICORN_THREADS', default=16 if worker_class == 'gthread' else 1
+))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
@@ -0,0 +1,82 @@
+"""Обработчик и фильтр для настройки LOGGING в settings.py."""
+import atexit
+import itertools
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """Пишет записи в поток из фонового потока QueueListener.
+
+    Сообщение форматируется в потоке запроса (QueueHandler.prepare): позже
+    изменяемые аргументы уже могли бы поменяться, а __str__ моделей —
+    обращаться к базе из потока без закрываемого соединения. Слушатель
+    только пишет готовые строки в stdout. Он запускается при первой
+    записи в каждом процессе, так что переживает fork воркеров gunicorn.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream)
+        self.target.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = None
+        self.pid = None
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            # Блокировка обработчика (RLock) logging пересоздаёт после
+            # fork, поэтому она подходит для однократного запуска слушателя.
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.start()
+        super().emit(record)
+
+    def start(self):
+        self.pid = os.getpid()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        with self.lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+                self.listener = None
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
+
+
+class DebugSampleFilter(logging.Filter):
+    """Пропускает каждую rate-ю запись уровня DEBUG, остальные — все."""
+
+    def __init__(self, rate=1):
+        super().__init__()
+        self.rate = max(int(rate), 1)
+        self.counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        return next(self.counter) % self.rate == 0
+
+
+def logger_levels(default, overrides):
+    """Уровни логгеров из строки вида 'api.permissions=DEBUG,reviews=INFO'.
+
+    Логгеры api и reviews получают уровень default, если он не
+    переопределён.
+    """
+    levels = {'api': default, 'reviews': default}
+    for item in overrides.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return {
+        name: {'level': level, 'handlers': ['console'], 'propagate': False}
+        for name, level in levels.items()
+    }
@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 
+from api_yamdb.log import logger_levels
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +81,114 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения каталога (api.replicas). DB_REPLICA_HOST — адреса
+# реплик через запятую, остальные параметры берутся у основной базы.
+# DB_REPLICA_NAME задаёт другое имя базы, например второй файл SQLite или
+# вторую локальную базу PostgreSQL. Первая реплика называется 'replica',
+# следующие — 'replica_2', 'replica_3' и т. д.
+
+replica_hosts = [
+    host.strip()
+    for host in os.getenv('DB_REPLICA_HOST', default='').split(',')
+    if host.strip()
+]
+if not replica_hosts and os.getenv('DB_REPLICA_NAME'):
+    replica_hosts = [DATABASES['default']['HOST']]
+for number, host in enumerate(replica_hosts, start=1):
+    DATABASES['replica' if number == 1 else f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'NAME': os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Сколько секунд после изменения данных их читают из основной базы.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+
+
+# Leaderboards
+# Сколько мест в подборках, сколько средних оценок каталога добавляется к
+# оценкам произведения в подборке лучших и за сколько дней вдвое
+# затухает вклад отзыва в подборке популярных (см. reviews.leaderboards).
+
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', default=100))
+LEADERBOARD_MIN_VOTES = int(os.getenv('LEADERBOARD_MIN_VOTES', default=10))
+TRENDING_HALF_LIFE_DAYS = float(os.getenv('TRENDING_HALF_LIFE_DAYS', default=7))
+
+
+# Cache
+# Ответы каталога кэшируются в отдельном кэше 'api'. Для нескольких
+# воркеров gunicorn укажите общий бэкенд, например
+# API_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# и API_CACHE_LOCATION=/var/tmp/yamdb_cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.getenv('API_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default='api'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=300)),
+    },
+    # Счётчики ограничения частоты запросов к /auth/ (api.throttling).
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+API_CACHE_ALIAS = 'api'
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+
+# Logging
+# Записи пишет в stdout фоновый поток, запрос только ставит их в очередь.
+# LOG_LEVEL задаёт уровень логгеров api и reviews, LOG_LEVELS — уровни
+# отдельных логгеров (api.permissions=DEBUG,reviews.models=INFO).
+# LOG_DEBUG_SAMPLE_RATE=N пропускает только каждую N-ю запись DEBUG.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s - строка %(lineno)s',
+        },
+    },
+    'filters': {
+        'debug_sample': {
+            '()': 'api_yamdb.log.DebugSampleFilter',
+            'rate': int(os.getenv('LOG_DEBUG_SAMPLE_RATE', default=1)),
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'api_yamdb.log.BackgroundStreamHandler',
+            'stream': 'ext://sys.stdout',
+            'formatter': 'default',
+            'filters': ['debug_sample'],
+        },
+    },
+    'loggers': logger_levels(
+        os.getenv('LOG_LEVEL', default='INFO').upper(),
+        os.getenv('LOG_LEVELS', default='')
+    ),
+}
+
+
+# Metrics
+# /metrics отдаёт метрики в формате Prometheus по заголовку
+# Authorization: Bearer <METRICS_TOKEN>; без токена эндпойнт выключен.
+# Воркеры gunicorn раз в METRICS_FLUSH_INTERVAL секунд сбрасывают свои
+# метрики в METRICS_DIR; каталог очищается при каждом запуске сервиса.
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+METRICS_DIR = os.getenv('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', default=1))
+
 
 # Password validation
 
@@ -125,7 +236,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.TokenUserAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -134,8 +245,21 @@ REST_FRAMEWORK = {
 
     'PAGE_SIZE': 5,
 
+    # Лимиты /auth/signup/ и /auth/token/: с одного IP-адреса и на один
+    # username. За nginx укажите NUM_PROXIES=1, чтобы IP-адрес клиента
+    # брался из X-Forwarded-For.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_THROTTLE_RATE', default='30/min'),
+        'auth_username': os.getenv('AUTH_USERNAME_THROTTLE_RATE', default='5/min'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
 }
 
+# Списки с api.pagination.EstimatedCountPagination, в которых по оценке
+# планировщика PostgreSQL не меньше стольких строк, не выполняют COUNT(*)
+# и отдают count_estimated: true.
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', default=100000))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -145,10 +269,15 @@ AUTH_USER_MODEL = 'reviews.CustomUser'
 
 EMPTY_VALUE: str = '-пусто-'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Письма отправляет команда send_outbox. Для проверки без внешнего MTA
+# подойдут EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend или
+# локальный SMTP-сервер (EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=0).
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', default=587))
+EMAIL_USE_TLS = os.getenv(
+    'EMAIL_USE_TLS', default='1'
+).lower() in ('1', 'true', 'yes', 'on')
 EMAIL_HOST_USER = 'orel333app@gmail.com'
 EMAIL_HOST_PASSWORD = os.getenv('MAIL_PASSWORD')
 # EMAIL_HOST_PASSWORD = MAIL_PASSWORD
@@ -1,9 +1,13 @@
-from api.serializers import logger
+import logging
+
 from api_yamdb.settings import EMPTY_VALUE
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Comment, CustomUser, Genre, Review, Title
+from .models import (Category, Comment, CustomUser, Genre, OutgoingEmail,
+                     Review, Title)
+
+logger = logging.getLogger(__name__)
 
 
 @admin.register(CustomUser)
@@ -58,7 +62,7 @@ class UserAdminConfig(UserAdmin):
         return request.user.is_staff
 
     def has_change_permission(self, request, obj=None):
-        logger.debug(obj)
+        logger.debug('%s', obj)
         if obj:
             return request.user.is_staff and not obj.is_staff
         return request.user.is_staff
@@ -67,7 +71,7 @@ class UserAdminConfig(UserAdmin):
         return request.user.is_staff
 
     def save_model(self, request, obj, form, change):
-        logger.debug(change)
+        logger.debug('%s', change)
         if isinstance(obj, CustomUser):
             logger.debug('The object was recognized as CustomUser instance')
             super().save_model(request, obj, form, change)
@@ -79,8 +83,8 @@ class UserAdminConfig(UserAdmin):
             else:
                 obj.is_staff = False
             obj.save()
-            confirmation_code = obj.confirmation_code
-            token = obj.token
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
             if change:
                 if obj.is_superuser:
                     pre_first_line = (f'\tВНИМАНИЕ! Объект был изменен на '
@@ -97,13 +101,12 @@ class UserAdminConfig(UserAdmin):
                     first_line = f'Создан пользователь {username}.'
             # при запуске в производство поставить отправку по почте
             logger.debug(
-                f'{first_line}\nЕго роль: {user_role}.\n'
-                f'Его токен: {token}\n'
-                f'Его confirmation_code для обновления токена:\n'
-                f'{confirmation_code}'
+                '%s\nЕго роль: %s.\nЕго токен: %s\n'
+                'Его confirmation_code для обновления токена:\n%s',
+                first_line, user_role, obj.token, obj.confirmation_code
             )
-            logger.debug(f'user is active: {obj.is_active}')
-            logger.debug(f'user is staff: {obj.is_staff}')
+            logger.debug('user is active: %s', obj.is_active)
+            logger.debug('user is staff: %s', obj.is_staff)
         else:
             super().save_model(request, obj, form, change)
 
@@ -155,4 +158,18 @@ class TitleAdminConfig(admin.ModelAdmin):
         'year',
         'description',
         'category',
+        'rating',
+    )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdminConfig(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'to',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
     )
+    list_filter = ('status',)
@@ -0,0 +1,181 @@
+"""Подборки лучших и популярных произведений.
+
+Лучшие упорядочены по байесовскому среднему
+(rating_sum + m·C) / (rating_count + m), где m — LEADERBOARD_MIN_VOTES,
+а C — средняя оценка по каталогу: у произведения с одной десяткой
+рейтинг остаётся близким к C, пока не наберётся достаточно отзывов.
+
+Популярные упорядочены по числу отзывов, вклад каждого из которых
+затухает вдвое за TRENDING_HALF_LIFE_DAYS. Хранится логарифм
+Σ exp(λ·t) по временам публикации t: ключ не нужно пересчитывать с
+течением времени, а новый отзыв добавляется к нему одним UPDATE.
+Текущее значение — exp(key − λ·now).
+"""
+import math
+import time
+
+from api.cache import get_cache
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Case, F, FloatField, OuterRef, Subquery, Sum,
+                              Value, When)
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .models import Review, Title, TitleLeaderboard
+
+MEAN_SCORE_KEY = 'reviews:leaderboards:mean_score'
+MEAN_SCORE_TIMEOUT = 60 * 60
+# Ниже exp() в PostgreSQL сообщает об исчезновении порядка, а вклад
+# слагаемого в сумму всё равно меньше точности float.
+MIN_EXPONENT = -700
+# Отзывы старше стольких периодов полураспада при пересчёте не учитываются.
+HORIZON_HALF_LIVES = 30
+
+
+def decay_rate():
+    """λ: во сколько раз в секунду затухает вклад отзыва, в логарифме."""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_DAYS * 24 * 60 * 60)
+
+
+def trending_key(moment):
+    return decay_rate() * moment.timestamp()
+
+
+def trending_score(key, now=None):
+    """Число отзывов с учётом затухания на момент now."""
+    now = timezone.now() if now is None else now
+    return math.exp(key - trending_key(now))
+
+
+def trending_threshold(min_score, now=None):
+    """Наименьший ключ, у которого значение не меньше min_score."""
+    now = timezone.now() if now is None else now
+    return trending_key(now) + math.log(min_score)
+
+
+def mean_score(refresh=False):
+    """Средняя оценка видимых произведений (C), кэшируется на час."""
+    cache = get_cache()
+    value = None if refresh else cache.get(MEAN_SCORE_KEY)
+    if value is None:
+        totals = Title.objects.filter(is_hidden=False).aggregate(
+            total=Sum('rating_sum'), count=Sum('rating_count')
+        )
+        value = (
+            totals['total'] / totals['count'] if totals['count'] else 0.0
+        )
+        cache.set(MEAN_SCORE_KEY, value, MEAN_SCORE_TIMEOUT)
+    return value
+
+
+def weighted_rating(mean):
+    """Выражение байесовского среднего над полями Title."""
+    votes = settings.LEADERBOARD_MIN_VOTES
+    return Case(
+        When(rating_count=0, then=None),
+        default=(
+            (F('rating_sum') + Value(votes * mean))
+            / (F('rating_count') + Value(float(votes)))
+        ),
+        output_field=FloatField(),
+    )
+
+
+def weighted_rating_subquery(mean):
+    return Subquery(
+        Title.objects.filter(pk=OuterRef('title_id')).annotate(
+            weighted=weighted_rating(mean)
+        ).values('weighted')[:1],
+        output_field=FloatField(),
+    )
+
+
+def update_leaderboard(title_id, added=None, removed=None):
+    """Пересчитывает строку произведения после изменения его отзывов.
+
+    added и removed — даты публикации появившегося и исчезнувшего
+    отзыва. Всё изменение — один UPDATE по значениям строки до него.
+    """
+    if title_id is None:
+        return
+    changes = {'weighted_rating': weighted_rating_subquery(mean_score())}
+    key = F('trending')
+    if added is not None:
+        value = Value(trending_key(added))
+        key = Greatest(key, value) + Ln(1 + Exp(Greatest(
+            Least(key, value) - Greatest(key, value), MIN_EXPONENT
+        )))
+    if removed is not None:
+        value = Value(trending_key(removed))
+        # Когда убран последний отзыв, ключ уходит на ~690 вниз, и
+        # значение становится неотличимым от нуля.
+        key = key + Ln(Greatest(
+            1 - Exp(Greatest(Least(value - key, 0), MIN_EXPONENT)),
+            Value(1e-300)
+        ))
+    if added is not None or removed is not None:
+        changes['trending'] = key
+    TitleLeaderboard.objects.filter(title_id=title_id).update(**changes)
+
+
+def trending_keys(now=None):
+    """Ключи популярности по отзывам за горизонт пересчёта."""
+    now = timezone.now() if now is None else now
+    rate = decay_rate()
+    since = now - timezone.timedelta(
+        days=settings.TRENDING_HALF_LIFE_DAYS * HORIZON_HALF_LIVES
+    )
+    keys = {}
+    current_id, exponents = None, []
+    reviews = Review.objects.filter(
+        pub_date__gte=since, is_hidden=False
+    ).order_by('title_id').values_list('title_id', 'pub_date').iterator()
+    for title_id, pub_date in reviews:
+        if title_id != current_id:
+            if exponents:
+                keys[current_id] = log_sum_exp(exponents)
+            current_id, exponents = title_id, []
+        exponents.append(rate * pub_date.timestamp())
+    if exponents:
+        keys[current_id] = log_sum_exp(exponents)
+    return keys
+
+
+def log_sum_exp(exponents):
+    top = max(exponents)
+    return top + math.log(sum(math.exp(value - top) for value in exponents))
+
+
+def rebuild_leaderboards(batch_size=1000):
+    """Заново считает обе подборки по всем произведениям.
+
+    Возвращает количество строк и время пересчёта в секундах.
+    """
+    started = time.perf_counter()
+    keys = trending_keys()
+    with transaction.atomic():
+        TitleLeaderboard.objects.bulk_create(
+            (
+                TitleLeaderboard(title_id=title_id)
+                for title_id in Title.objects.filter(
+                    leaderboard__isnull=True
+                ).values_list('pk', flat=True).iterator()
+            ),
+            ignore_conflicts=True
+        )
+        TitleLeaderboard.objects.update(
+            weighted_rating=weighted_rating_subquery(
+                mean_score(refresh=True)
+            ),
+            trending=0,
+        )
+        TitleLeaderboard.objects.bulk_update(
+            [
+                TitleLeaderboard(title_id=title_id, trending=key)
+                for title_id, key in keys.items()
+            ],
+            ['trending'], batch_size=batch_size
+        )
+        total = TitleLeaderboard.objects.count()
+    return total, time.perf_counter() - started
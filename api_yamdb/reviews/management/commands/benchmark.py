@@ -0,0 +1,276 @@
+import json
+import math
+import time
+from io import StringIO
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.utils import timezone
+from reviews.models import Comment, CustomUser, Review, Title
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая SQL-запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = math.ceil(share * len(ordered)) - 1
+    return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает основные эндпойнты API через тестовый клиент в этом же '
+        'процессе и сообщает перцентили задержки, пропускную способность и '
+        'число SQL-запросов. Все запросы выполняются в одной транзакции, '
+        'которая откатывается в конце, так что база не меняется. Результат '
+        'можно сохранить в JSON и сравнить с прошлым запуском.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Сколько замеряемых запросов отправить к каждому эндпойнту.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Сколько запросов отправить до замеров.'
+        )
+        parser.add_argument(
+            '--only', action='append', default=[], metavar='NAME',
+            help='Замерить только указанные эндпойнты.'
+        )
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не очищать кэш API перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--generate', action='store_true',
+            help='Создать набор данных generate_dataset с параметрами по '
+                 'умолчанию внутри откатываемой транзакции.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--max-slowdown', type=float, default=1.25,
+            help='Во сколько раз может вырасти p95 относительно baseline.'
+        )
+        parser.add_argument(
+            '--max-extra-queries', type=int, default=0,
+            help='На сколько может вырасти число SQL-запросов.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.cache = caches[settings.API_CACHE_ALIAS]
+        host = settings.ALLOWED_HOSTS[0]
+        self.client = Client(HTTP_HOST='testserver' if host == '*' else host)
+        with transaction.atomic():
+            if options['generate']:
+                call_command('generate_dataset', stdout=StringIO())
+            results = [
+                self.measure(name, method, make_request)
+                for name, method, make_request in self.endpoints()
+                if not options['only'] or name in options['only']
+            ]
+            transaction.set_rollback(True)
+        self.cache.clear()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+            'warm_cache': options['warm_cache'],
+            'endpoints': results,
+        }
+        for result in results:
+            self.stdout.write(
+                '{name:<16} p50 {p50_ms:8.2f} мс  p95 {p95_ms:8.2f} мс  '
+                'p99 {p99_ms:8.2f} мс  {rps:8.1f} запр/с  '
+                'SQL {queries:3}  ошибок {errors}'.format(**result)
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results)
+
+    def endpoints(self):
+        title = Title.objects.order_by('pk').select_related(
+            'category'
+        ).first()
+        if title is None:
+            raise CommandError(
+                'В базе нет произведений: заполните её командой '
+                'generate_dataset или запустите benchmark с --generate.'
+            )
+        review = Review.objects.filter(title=title).order_by('pk').first()
+        genre = title.genre.order_by('slug').first()
+        titles = f'/api/v1/titles/?genre={genre.slug if genre else ""}'
+        pages = Title.objects.count() // settings.REST_FRAMEWORK['PAGE_SIZE']
+        users = self.create_users()
+        numbers = count()
+
+        def get(path, **headers):
+            return lambda index: (path, None, headers)
+
+        def signup(index):
+            number = next(numbers)
+            return '/api/v1/auth/signup/', {
+                'username': f'benchmark-signup-{number}',
+                'email': f'benchmark-signup-{number}@mail.ru',
+            }, {}
+
+        def token(index):
+            user = users[index % len(users)]
+            return '/api/v1/auth/token/', {
+                'username': user.username,
+                'confirmation_code': user.confirmation_code,
+            }, {}
+
+        yield 'titles', 'get', get('/api/v1/titles/')
+        yield 'titles-fields', 'get', get('/api/v1/titles/?fields=id,name')
+        yield 'titles-page', 'get', get(
+            f'/api/v1/titles/?page={max(pages // 2, 1)}'
+        )
+        yield 'titles-filter', 'get', get(
+            f'{titles}&year_min=1950&year_max=2000'
+        )
+        yield 'titles-search', 'get', get(
+            f'/api/v1/titles/?search={title.name.split()[0]}'
+        )
+        yield 'titles-top', 'get', get(
+            f'/api/v1/titles/top/?genre={genre.slug if genre else ""}'
+        )
+        yield 'titles-trending', 'get', get('/api/v1/titles/trending/')
+        yield 'title', 'get', get(f'/api/v1/titles/{title.pk}/')
+        ids = ','.join(str(pk) for pk in range(title.pk, title.pk + 100))
+        yield 'titles-scores', 'get', get(f'/api/v1/titles/scores/?ids={ids}')
+        yield 'reviews', 'get', get(f'/api/v1/titles/{title.pk}/reviews/')
+        yield 'reviews-scores', 'get', get(
+            f'/api/v1/titles/{title.pk}/reviews/?fields=id,score'
+        )
+        yield 'reviews-cursor', 'get', get(
+            f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        )
+        if review is not None:
+            yield 'comments', 'get', get(
+                f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            )
+        yield 'signup', 'post', signup
+        yield 'token', 'post', token
+        yield 'users-me', 'get', get(
+            '/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {users[0].token}'
+        )
+
+    def create_users(self):
+        """Пользователи для эндпойнтов token и users/me."""
+        total = self.options['warmup'] + self.options['requests'] + 1
+        CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f'benchmark-{number}',
+                email=f'benchmark-{number}@mail.ru',
+            )
+            for number in range(total)
+        )
+        return list(
+            CustomUser.objects.filter(username__startswith='benchmark-')
+        )
+
+    def prepare(self, make_request, index):
+        """Готовит запрос; очистка кэшей в замер не попадает."""
+        if not self.options['warm_cache']:
+            self.cache.clear()
+        # Замеряется обработка запроса, а не ответ 429 ограничителя /auth/.
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        return make_request(index)
+
+    def send(self, method, path, data, headers):
+        if method == 'post':
+            return self.client.post(
+                path, data, content_type='application/json', **headers
+            )
+        return self.client.get(path, **headers)
+
+    def measure(self, name, method, make_request):
+        warmup = self.options['warmup']
+        for index in range(warmup):
+            self.send(method, *self.prepare(make_request, index))
+        request = self.prepare(make_request, warmup)
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            self.send(method, *request)
+        timings = []
+        errors = 0
+        first = warmup + 1
+        for index in range(first, first + self.options['requests']):
+            request = self.prepare(make_request, index)
+            request_started = time.perf_counter()
+            response = self.send(method, *request)
+            timings.append(time.perf_counter() - request_started)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = sum(timings)
+        return {
+            'name': name,
+            'method': method.upper(),
+            'path': make_request(0)[0] if method == 'get' else None,
+            'requests': len(timings),
+            'errors': errors,
+            'queries': queries.count,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'rps': len(timings) / elapsed if elapsed else 0,
+        }
+
+    def compare(self, results):
+        with open(self.options['baseline'], encoding='utf-8') as baseline:
+            previous = {
+                result['name']: result
+                for result in json.load(baseline)['endpoints']
+            }
+        regressions = []
+        for result in results:
+            before = previous.get(result['name'])
+            if before is None:
+                continue
+            if result['p95_ms'] > before['p95_ms'] * (
+                self.options['max_slowdown']
+            ):
+                regressions.append(
+                    f'{result["name"]}: p95 {before["p95_ms"]:.2f} → '
+                    f'{result["p95_ms"]:.2f} мс'
+                )
+            if result['queries'] > before['queries'] + (
+                self.options['max_extra_queries']
+            ):
+                regressions.append(
+                    f'{result["name"]}: SQL-запросов {before["queries"]} → '
+                    f'{result["queries"]}'
+                )
+        for regression in regressions:
+            self.stderr.write(regression)
+        if regressions:
+            raise CommandError(
+                f'Регрессии относительно baseline: {len(regressions)}.'
+            )
+        self.stdout.write('Регрессий относительно baseline нет.')
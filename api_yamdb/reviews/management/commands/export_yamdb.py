@@ -0,0 +1,42 @@
+from api.export import ENCODERS, ITERATORS, export
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает произведения (с категорией, жанрами и '
+        'рейтингом), отзывы или комментарии в NDJSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=sorted(ITERATORS))
+        parser.add_argument(
+            '--format', dest='file_format', choices=sorted(ENCODERS),
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--output', help='Файл выгрузки (по умолчанию stdout).'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из курсора за раз.'
+        )
+        parser.add_argument('--title-min', type=int)
+        parser.add_argument('--title-max', type=int)
+
+    def handle(self, *args, **options):
+        chunks = export(
+            options['entity'],
+            options['file_format'],
+            chunk_size=options['chunk_size'],
+            title_min=options['title_min'],
+            title_max=options['title_max'],
+        )
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,248 @@
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+
+from .import_yamdb import finish_bulk_load, keep_pub_date
+
+GenreTitle = Title.genre.through
+
+WORDS = (
+    'война', 'мир', 'любовь', 'время', 'дорога', 'город', 'море', 'ночь',
+    'солнце', 'история', 'тайна', 'дом', 'сердце', 'зима', 'лето', 'огонь',
+    'небо', 'песня', 'судьба', 'тень', 'остров', 'звезда', 'память',
+    'свобода', 'ветер', 'сад', 'поезд', 'письмо', 'брат', 'сестра', 'герой',
+    'последний', 'первый', 'тихий', 'белый', 'чёрный', 'старый', 'новый',
+    'долгий', 'далёкий', 'странный', 'красивый', 'хороший', 'скучный',
+)
+# Начало периода, по которому распределяются даты отзывов и комментариев.
+SINCE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+# Сколько случайных произведений или отзывов выбирается за раз. Размер
+# порции не зависит от --batch-size, чтобы при одном --seed данные
+# совпадали при любом размере bulk_create.
+SAMPLE_SIZE = 100000
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса 1 / rank ** skew для random.choices."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетический набор данных для проверки производительности: '
+        'пользователей, категории, жанры, произведения, отзывы и комментарии. '
+        'Популярность произведений, отзывов и активность пользователей '
+        'подчиняются закону Ципфа; при одинаковом --seed на пустой базе '
+        'данные совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 1000),
+            ('categories', 10),
+            ('genres', 30),
+            ('titles', 10000),
+            ('reviews', 100000),
+            ('comments', 100000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать (по умолчанию {default}).'
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--title-skew', type=float, default=1.0,
+            help='Показатель Ципфа для числа отзывов у произведений.'
+        )
+        parser.add_argument(
+            '--review-skew', type=float, default=1.2,
+            help='Показатель Ципфа для числа комментариев у отзывов.'
+        )
+        parser.add_argument(
+            '--user-skew', type=float, default=0.8,
+            help='Показатель Ципфа для активности комментаторов.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=3650,
+            help='За сколько дней от 2015-01-01 распределены даты.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одном bulk_create.'
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должно быть больше нуля.')
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.span = timedelta(days=options['days']).total_seconds()
+        self.first_id = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (CustomUser, Category, Genre, Title, Review, Comment)
+        }
+
+        self.insert('users', CustomUser, self.build_users())
+        self.insert('category', Category, self.build_slugged(
+            Category, 'categories', 'Категория', 'category'
+        ))
+        self.insert('genre', Genre, self.build_slugged(
+            Genre, 'genres', 'Жанр', 'genre'
+        ))
+        self.insert('titles', Title, self.build_titles())
+        self.insert('genre_title', GenreTitle, self.build_genre_title())
+        with keep_pub_date(Review, Comment):
+            reviews = self.insert('review', Review, self.build_reviews())
+            if reviews < options['reviews']:
+                # Отзывы, не поместившиеся даже в последние произведения.
+                self.stdout.write(
+                    f'review: создано {reviews} из {options["reviews"]}, '
+                    f'у каждого произведения не больше {options["users"]} '
+                    'отзывов — по одному от пользователя'
+                )
+            if reviews:
+                self.insert(
+                    'comments', Comment, self.build_comments(reviews)
+                )
+        finish_bulk_load(
+            [CustomUser, Category, Genre, Title, GenreTitle, Review, Comment],
+            self.batch_size,
+            self.stdout
+        )
+
+    def insert(self, name, model, objects):
+        started = time.monotonic()
+        done = 0
+        while True:
+            chunk = list(islice(objects, self.batch_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            done += len(chunk)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{name}: {done} строк, '
+                f'{done / elapsed if elapsed else done:.0f} строк/с'
+            )
+        return done
+
+    def words(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def pub_date(self):
+        return SINCE + timedelta(seconds=self.rng.random() * self.span)
+
+    def build_users(self):
+        password = make_password(None)
+        first = self.first_id[CustomUser]
+        for pk in range(first, first + self.options['users']):
+            yield CustomUser(
+                id=pk,
+                username=f'user{pk}',
+                email=f'user{pk}@example.com',
+                password=password,
+            )
+
+    def build_slugged(self, model, option, name, slug):
+        first = self.first_id[model]
+        for pk in range(first, first + self.options[option]):
+            yield model(id=pk, name=f'{name} {pk}', slug=f'{slug}-{pk}')
+
+    def build_titles(self):
+        # Чем меньше id произведения, тем оно популярнее: так же устроены
+        # веса отзывов ниже.
+        categories = zipf_weights(self.options['categories'], 1)
+        first = self.first_id[Title]
+        for pk in range(first, first + self.options['titles']):
+            yield Title(
+                id=pk,
+                name=self.words(1, 4).capitalize(),
+                year=self.rng.randint(1900, 2022),
+                description=self.words(5, 30).capitalize() + '.',
+                category_id=self.first_id[Category] + self.rng.choices(
+                    range(self.options['categories']), cum_weights=categories
+                )[0],
+            )
+
+    def build_genre_title(self):
+        genres = range(self.options['genres'])
+        for index in range(self.options['titles']):
+            for genre in self.rng.sample(
+                genres, self.rng.randint(1, min(3, len(genres)))
+            ):
+                yield GenreTitle(
+                    title_id=self.first_id[Title] + index,
+                    genre_id=self.first_id[Genre] + genre,
+                )
+
+    def build_reviews(self):
+        users = self.options['users']
+        titles = range(self.options['titles'])
+        weights = zipf_weights(len(titles), self.options['title_skew'])
+        counts = [0] * len(titles)
+        left = self.options['reviews']
+        while left > 0:
+            for index in self.rng.choices(
+                titles, cum_weights=weights, k=min(left, SAMPLE_SIZE)
+            ):
+                counts[index] += 1
+            left -= SAMPLE_SIZE
+        pk = self.first_id[Review]
+        extra = 0
+        for index, sampled in enumerate(counts):
+            # Один пользователь оставляет к произведению один отзыв, поэтому
+            # отзывы сверх числа авторов переходят к следующему произведению.
+            count = min(sampled + extra, users)
+            extra = sampled + extra - count
+            quality = self.rng.uniform(3, 9)
+            for author in self.rng.sample(range(users), count):
+                score = round(self.rng.gauss(quality, 1.5))
+                yield Review(
+                    id=pk,
+                    title_id=self.first_id[Title] + index,
+                    author_id=self.first_id[CustomUser] + author,
+                    text=self.words(5, 40).capitalize() + '.',
+                    score=min(max(score, 1), 10),
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
+
+    def build_comments(self, reviews):
+        # Отзывы идут в порядке популярности произведений, так что самые
+        # обсуждаемые отзывы оказываются у самых популярных произведений.
+        review_weights = zipf_weights(reviews, self.options['review_skew'])
+        user_weights = zipf_weights(
+            self.options['users'], self.options['user_skew']
+        )
+        left = self.options['comments']
+        pk = self.first_id[Comment]
+        while left > 0:
+            size = min(left, SAMPLE_SIZE)
+            review_ids = self.rng.choices(
+                range(reviews), cum_weights=review_weights, k=size
+            )
+            author_ids = self.rng.choices(
+                range(self.options['users']), cum_weights=user_weights,
+                k=size
+            )
+            for review, author in zip(review_ids, author_ids):
+                yield Comment(
+                    id=pk,
+                    review_id=self.first_id[Review] + review,
+                    author_id=self.first_id[CustomUser] + author,
+                    text=self.words(3, 25).capitalize() + '.',
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
+            left -= size
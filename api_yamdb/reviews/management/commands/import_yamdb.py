@@ -0,0 +1,319 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from api.cache import bump_versions
+from api.search import rebuild_title_index
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from reviews.leaderboards import rebuild_leaderboards
+from reviews.models import (SCORES, Category, Comment, CustomUser, Genre,
+                            Review, Title)
+
+GenreTitle = Title.genre.through
+
+# Файлы импортируются в этом порядке: каждый следующий ссылается
+# на уже загруженные данные предыдущих.
+ENTITIES = (
+    ('users', CustomUser),
+    ('category', Category),
+    ('genre', Genre),
+    ('titles', Title),
+    ('genre_title', GenreTitle),
+    ('review', Review),
+    ('comments', Comment),
+)
+# Поле, по диапазону значений которого в порции считаются вставленные
+# строки: ignore_conflicts не сообщает, какие строки пропущены.
+CHUNK_KEYS = {
+    'users': 'username',
+    'category': 'slug',
+    'genre': 'slug',
+    'titles': 'id',
+    'genre_title': 'title_id',
+    'review': 'id',
+    'comments': 'id',
+}
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Не даёт auto_now_add затереть дату публикации из файла."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def finish_bulk_load(models, chunk_size, stdout):
+    """Приводит в порядок то, что bulk_create обходит стороной.
+
+    Сдвигает последовательности id за загруженные строки, пересчитывает
+    рейтинги, подборки и поисковый индекс и сбрасывает кэш API.
+    """
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    call_command('reconcile_ratings', chunk_size=chunk_size, stdout=stdout)
+    rebuild_leaderboards(chunk_size)
+    rebuild_title_index()
+    bump_versions('titles', 'categories', 'genres')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует пользователей, категории, жанры, произведения, '
+        'отзывы и комментарии из CSV или NDJSON файлов каталога DIR: '
+        'users, category, genre, titles, genre_title, review, comments '
+        '(расширение .csv или .ndjson). Категории и жанры указываются '
+        'слагами, авторы — именами пользователей, произведения, отзывы и '
+        'комментарии — своими id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', metavar='DIR')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одном bulk_create.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с места, сохранённого в файле состояния.'
+        )
+        parser.add_argument(
+            '--state-file',
+            help='Файл состояния импорта (по умолчанию DIR/.import_state).'
+        )
+
+    def handle(self, *args, **options):
+        self.directory = options['directory']
+        self.batch_size = options['batch_size']
+        self.state_file = options['state_file'] or os.path.join(
+            self.directory, '.import_state'
+        )
+        self.state = self.load_state() if options['resume'] else {}
+        self.categories = dict(Category.objects.values_list('slug', 'pk'))
+        self.genres = dict(Genre.objects.values_list('slug', 'pk'))
+        self.users = dict(CustomUser.objects.values_list('username', 'pk'))
+        self.unusable_password = make_password(None)
+
+        with keep_pub_date(Review, Comment):
+            for name, model in ENTITIES:
+                path = self.find_file(name)
+                if path is not None:
+                    self.import_file(name, model, path)
+
+        finish_bulk_load(
+            [model for _, model in ENTITIES], self.batch_size, self.stdout
+        )
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+    def find_file(self, name):
+        for extension in ('csv', 'ndjson'):
+            path = os.path.join(self.directory, f'{name}.{extension}')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, encoding='utf-8') as state:
+            return json.load(state)
+
+    def save_state(self):
+        with open(self.state_file, 'w', encoding='utf-8') as state:
+            json.dump(self.state, state)
+
+    def read_rows(self, path):
+        with open(path, encoding='utf-8', newline='') as source:
+            if path.endswith('.csv'):
+                yield from csv.DictReader(source)
+                return
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+    def import_file(self, name, model, path):
+        done = self.state.get(name, 0)
+        build = getattr(self, f'build_{name}')
+        rows = islice(self.read_rows(path), done, None)
+        started = time.monotonic()
+        processed = inserted = 0
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            objects = [build(row) for row in chunk]
+            try:
+                # Внешние ключи проверяются при фиксации транзакции, поэтому
+                # ошибка ссылки возникает на выходе из atomic.
+                with transaction.atomic():
+                    chunk_rows = self.chunk_rows(name, model, objects)
+                    before = chunk_rows.count()
+                    # ignore_conflicts делает повторную загрузку порции,
+                    # уже записанной до сбоя, безопасной.
+                    model.objects.bulk_create(objects, ignore_conflicts=True)
+                    inserted += chunk_rows.count() - before
+            except IntegrityError as error:
+                raise CommandError(
+                    f'{os.path.basename(path)}, строки {done + 1}–'
+                    f'{done + len(chunk)}: ссылка на несуществующую запись '
+                    f'({error})'
+                )
+            done += len(chunk)
+            processed += len(chunk)
+            self.state[name] = done
+            self.save_state()
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{name}: {done} строк, '
+                f'{processed / elapsed if elapsed else processed:.0f} строк/с'
+            )
+        if processed:
+            self.stdout.write(
+                f'{name}: загружено {inserted}, пропущено из-за '
+                f'конфликтов {processed - inserted}'
+            )
+        self.after_import(name)
+
+    def chunk_rows(self, name, model, objects):
+        """Строки таблицы с ключами из диапазона порции.
+
+        Новые строки порции попадают в эту выборку, а остальные строки
+        внутри транзакции не меняются, поэтому разница счётчиков до и
+        после bulk_create — число действительно вставленных строк.
+        """
+        key = CHUNK_KEYS[name]
+        field = model._meta.get_field(key)
+        values = {
+            field.to_python(getattr(obj, field.attname)) for obj in objects
+        }
+        if all(isinstance(value, int) for value in values):
+            return model.objects.filter(**{
+                f'{key}__gte': min(values), f'{key}__lte': max(values)
+            })
+        # Порядок строк в базе зависит от сортировки (collation), поэтому
+        # строковые ключи сравниваются списком.
+        return model.objects.filter(**{f'{key}__in': values})
+
+    def after_import(self, name):
+        # Новые слаги и имена нужны для разрешения ссылок в следующих файлах.
+        if name == 'users':
+            self.users = dict(
+                CustomUser.objects.values_list('username', 'pk')
+            )
+        elif name == 'category':
+            self.categories = dict(
+                Category.objects.values_list('slug', 'pk')
+            )
+        elif name == 'genre':
+            self.genres = dict(Genre.objects.values_list('slug', 'pk'))
+
+    def resolve(self, mapping, value, message):
+        try:
+            return mapping[value]
+        except KeyError:
+            raise CommandError(f'{message}: {value}')
+
+    def build_users(self, row):
+        return CustomUser(
+            id=row.get('id') or None,
+            username=row['username'],
+            email=row['email'],
+            role=row.get('role') or 'user',
+            bio=row.get('bio') or '',
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            password=self.unusable_password,
+        )
+
+    def build_category(self, row):
+        return Category(
+            id=row.get('id') or None, name=row['name'], slug=row['slug']
+        )
+
+    def build_genre(self, row):
+        return Genre(
+            id=row.get('id') or None, name=row['name'], slug=row['slug']
+        )
+
+    def build_titles(self, row):
+        category = row.get('category')
+        return Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            description=row.get('description') or '',
+            category_id=self.resolve(
+                self.categories, category, 'Неизвестная категория'
+            ) if category else None,
+        )
+
+    def build_genre_title(self, row):
+        genre_id = row.get('genre_id') or self.resolve(
+            self.genres, row.get('genre'), 'Неизвестный жанр'
+        )
+        return GenreTitle(title_id=row['title_id'], genre_id=genre_id)
+
+    def build_review(self, row):
+        return Review(
+            id=row['id'],
+            title_id=row['title_id'],
+            author_id=self.resolve(
+                self.users, row['author'], 'Неизвестный автор'
+            ),
+            text=row['text'],
+            score=self.parse_score(row),
+            pub_date=self.parse_pub_date(row),
+        )
+
+    def build_comments(self, row):
+        return Comment(
+            id=row['id'],
+            review_id=row['review_id'],
+            author_id=self.resolve(
+                self.users, row['author'], 'Неизвестный автор'
+            ),
+            text=row['text'],
+            pub_date=self.parse_pub_date(row),
+        )
+
+    def parse_score(self, row):
+        try:
+            score = int(row['score'])
+        except (TypeError, ValueError):
+            score = None
+        if score not in SCORES:
+            raise CommandError(
+                f'Оценка отзыва {row["id"]} должна быть целым числом '
+                f'от {SCORES[0]} до {SCORES[-1]}: {row["score"]}'
+            )
+        return score
+
+    def parse_pub_date(self, row):
+        pub_date = row.get('pub_date')
+        if not pub_date:
+            return timezone.now()
+        try:
+            parsed = parse_datetime(pub_date)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(
+                f'Неверная дата публикации в строке {row["id"]}: {pub_date}'
+            )
+        return parsed
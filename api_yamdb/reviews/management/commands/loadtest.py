@@ -0,0 +1,114 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from .benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер параллельными GET-запросами и сообщает '
+        'перцентили задержки и пропускную способность. В адресах можно '
+        'указать {n} — сюда подставится номер запроса начиная с --start, '
+        'чтобы запросы не обслуживались из кэша ответов. Используется для '
+        'сравнения настроек gunicorn под одинаковой нагрузкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='+', metavar='URL',
+            help='Адреса, которые запрашиваются по очереди.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Сколько запросов выполняется одновременно.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Сколько запросов отправить всего.'
+        )
+        parser.add_argument(
+            '--start', type=int, default=1,
+            help='С какого номера подставлять {n} в адреса.'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Тайм-аут одного запроса в секундах.'
+        )
+        parser.add_argument(
+            '--header', action='append', default=[], metavar='NAME:VALUE',
+            help='Дополнительный заголовок запроса.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError(
+                '--concurrency и --requests должны быть положительными.'
+            )
+        self.options = options
+        self.headers = {}
+        for header in options['header']:
+            name, _, value = header.partition(':')
+            self.headers[name.strip()] = value.strip()
+        urls = cycle(options['urls'])
+        requests = [
+            next(urls).replace('{n}', str(number))
+            for number in range(
+                options['start'], options['start'] + options['requests']
+            )
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(self.send, requests))
+        elapsed = time.perf_counter() - started
+
+        timings = [duration for status, duration in results]
+        statuses = Counter(status for status, duration in results)
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'urls': options['urls'],
+            'concurrency': options['concurrency'],
+            'requests': len(results),
+            'errors': sum(
+                total for status, total in statuses.items()
+                if not 200 <= status < 400
+            ),
+            'statuses': {
+                str(status): total
+                for status, total in sorted(statuses.items())
+            },
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'rps': len(results) / elapsed if elapsed else 0,
+        }
+        self.stdout.write(
+            'запросов {requests}  параллельно {concurrency}  '
+            'p50 {p50_ms:.2f} мс  p95 {p95_ms:.2f} мс  p99 {p99_ms:.2f} мс  '
+            '{rps:.1f} запр/с  ошибок {errors}'.format(**report)
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    def send(self, url):
+        """Статус ответа (0 — нет соединения) и время запроса."""
+        request = Request(url, headers=self.headers)
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.options['timeout']) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = 0
+        return status, time.perf_counter() - started
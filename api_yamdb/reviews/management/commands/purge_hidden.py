@@ -0,0 +1,127 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews.models import Category, Comment, HideableModel, Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Физически удаляет скрытые через API отзывы, произведения и '
+        'категории. Зависимые строки удаляются (у категорий — отвязываются '
+        'от произведений) порциями, каждая в своей короткой транзакции; '
+        'после каждой порции печатается прогресс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько зависимых строк обрабатывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между порциями в секундах, чтобы не нагружать базу.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Пауза между опросами, когда скрытых объектов нет.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Удалить все скрытые объекты и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        while True:
+            started = time.monotonic()
+            progress = self.purge_step()
+            if progress is not None:
+                self.report(progress, time.monotonic() - started)
+                time.sleep(options['pause'])
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+    def purge_step(self):
+        """Одна порция работы над первым скрытым объектом.
+
+        Отзывы идут раньше произведений: их удаление дешевле и быстрее
+        освобождает место для новых отзывов авторов.
+        """
+        review = Review.objects.filter(is_hidden=True).order_by('pk').first()
+        if review is not None:
+            return self.delete_chunk(
+                f'Отзыв {review.pk}',
+                ('комментариев', Comment.objects.filter(review=review)),
+            ) or self.delete_object(f'Отзыв {review.pk}', review)
+        title = Title.objects.filter(is_hidden=True).order_by('pk').first()
+        if title is not None:
+            return self.delete_chunk(
+                f'Произведение {title.pk}',
+                ('комментариев', Comment.objects.filter(review__title=title)),
+                ('комментариев', Comment.objects.filter(title=title)),
+                ('отзывов', Review.objects.filter(title=title)),
+            ) or self.delete_object(f'Произведение {title.pk}', title)
+        category = Category.objects.filter(
+            is_hidden=True
+        ).order_by('pk').first()
+        if category is not None:
+            return self.release_titles(category) or self.delete_object(
+                f'Категория {category.slug}', category
+            )
+        return None
+
+    def chunk_ids(self, queryset):
+        return list(
+            queryset.order_by('pk').values_list('pk', flat=True)
+            [:self.options['batch_size']]
+        )
+
+    def delete_chunk(self, label, *dependents):
+        """Удаляет порцию первых непустых зависимых строк объекта."""
+        for name, queryset in dependents:
+            with transaction.atomic():
+                ids = self.chunk_ids(queryset)
+                if ids:
+                    chunk = queryset.model.objects.filter(pk__in=ids)
+                    if issubclass(queryset.model, HideableModel):
+                        # Отзывы скрытого произведения тоже скрываются:
+                        # тогда сигналы не пересчитывают его рейтинг и
+                        # подборки для каждой удаляемой строки.
+                        chunk.update(is_hidden=True)
+                    chunk.delete()
+                    return f'{label}: удалено {name} {len(ids)}'
+        return None
+
+    def release_titles(self, category):
+        with transaction.atomic():
+            ids = self.chunk_ids(Title.objects.filter(category=category))
+            if not ids:
+                return None
+            Title.objects.filter(pk__in=ids).update(
+                category=None, updated_at=timezone.now()
+            )
+        return (
+            f'Категория {category.slug}: отвязано произведений {len(ids)}'
+        )
+
+    def delete_object(self, label, instance):
+        instance.delete()
+        return f'{label}: объект удалён'
+
+    def report(self, progress, elapsed):
+        remaining = ', '.join(
+            f'{name} {model.objects.filter(is_hidden=True).count()}'
+            for name, model in (
+                ('отзывов', Review),
+                ('произведений', Title),
+                ('категорий', Category),
+            )
+        )
+        self.stdout.write(
+            f'{progress} за {elapsed * 1000:.0f} мс; '
+            f'осталось скрытых: {remaining}'
+        )
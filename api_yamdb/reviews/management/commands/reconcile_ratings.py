@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from reviews.models import SCORES, Review, Title, score_count_field
+
+SCORE_COUNT_FIELDS = [score_count_field(score) for score in SCORES]
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованный рейтинг и распределение оценок '
+        'произведений по отзывам порциями и сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество произведений, сверяемых в одной транзакции.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                titles = list(
+                    Title.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .values_list(
+                        'pk', 'rating_sum', 'rating_count', 'rating',
+                        *SCORE_COUNT_FIELDS
+                    )
+                    [:chunk_size]
+                )
+                if not titles:
+                    break
+                last_id = titles[-1][0]
+                drifted += self.reconcile_chunk(titles, dry_run, options)
+            checked += len(titles)
+        self.stdout.write(
+            f'Проверено произведений: {checked}, '
+            f'расхождений: {drifted}'
+            + (' (не исправлены, --dry-run).' if dry_run else '.')
+        )
+
+    def reconcile_chunk(self, titles, dry_run, options):
+        actual = defaultdict(lambda: dict.fromkeys(SCORES, 0))
+        # Скрытые отзывы уже вычтены из рейтинга при hide().
+        for title_id, score, count in Review.objects.filter(
+            title_id__in=[title[0] for title in titles], is_hidden=False
+        ).order_by().values_list('title_id', 'score').annotate(
+            count=Count('pk')
+        ):
+            actual[title_id][score] = count
+        drifted = 0
+        for title_id, rating_sum, rating_count, rating, *counts in titles:
+            histogram = actual[title_id]
+            total = sum(score * count for score, count in histogram.items())
+            count = sum(histogram.values())
+            expected_rating = total // count if count else None
+            if (rating_sum, rating_count, rating, counts) == (
+                total, count, expected_rating, list(histogram.values())
+            ):
+                continue
+            drifted += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'Произведение {title_id}: сохранено {rating_sum}/'
+                    f'{rating_count}, по отзывам {total}/{count}'
+                )
+            if not dry_run:
+                Title.objects.filter(pk=title_id).update(
+                    rating_sum=total,
+                    rating_count=count,
+                    rating=expected_rating,
+                    updated_at=timezone.now(),
+                    **{
+                        score_count_field(score): score_count
+                        for score, score_count in histogram.items()
+                    }
+                )
+        return drifted
@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди исходящей почты порциями через одно '
+        'SMTP-соединение, с повторными попытками и экспоненциальной паузой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько писем забирать из очереди за один раз.'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После стольких неудач письмо помечается недоставленным.'
+        )
+        parser.add_argument(
+            '--backoff', type=int, default=30,
+            help='Пауза перед первой повторной попыткой, в секундах; '
+                 'удваивается с каждой следующей.'
+        )
+        parser.add_argument(
+            '--lease', type=int, default=300,
+            help='На сколько секунд письма порции скрываются от других '
+                 'воркеров на время отправки.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Пауза между опросами пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать готовые к отправке письма и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.connection = get_connection()
+        try:
+            while True:
+                started = time.monotonic()
+                sent, failed = self.send_batch()
+                if sent or failed:
+                    self.report(sent, failed, time.monotonic() - started)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        finally:
+            self.connection.close()
+
+    def claim_batch(self):
+        """Забирает порцию писем, продлевая им срок следующей попытки.
+
+        Строки блокируются только на время UPDATE, так что отправка идёт
+        вне транзакции, а параллельные воркеры берут другие письма.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:self.options['batch_size']]
+            )
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(
+                next_attempt_at=now + timedelta(seconds=self.options['lease'])
+            )
+        return batch
+
+    def send_batch(self):
+        sent = failed = 0
+        for email in self.claim_batch():
+            try:
+                self.connection.open()
+                EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    email.to.split(','),
+                    connection=self.connection,
+                ).send()
+            except Exception as error:
+                # После сбоя соединение переоткрывается на следующем письме.
+                self.connection.close()
+                self.retry_later(email, error)
+                failed += 1
+            else:
+                OutgoingEmail.objects.filter(pk=email.pk).update(
+                    status='sent',
+                    attempts=email.attempts + 1,
+                    sent_at=timezone.now(),
+                    last_error='',
+                )
+                sent += 1
+        return sent, failed
+
+    def retry_later(self, email, error):
+        attempts = email.attempts + 1
+        delay = self.options['backoff'] * 2 ** (attempts - 1)
+        OutgoingEmail.objects.filter(pk=email.pk).update(
+            status=(
+                'failed' if attempts >= self.options['max_attempts']
+                else 'pending'
+            ),
+            attempts=attempts,
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+            last_error=repr(error),
+        )
+
+    def report(self, sent, failed, elapsed):
+        pending = OutgoingEmail.objects.filter(status='pending').count()
+        self.stdout.write(
+            f'Отправлено: {sent}, ошибок: {failed}, '
+            f'{sent / elapsed if elapsed else sent:.1f} писем/с, '
+            f'в очереди: {pending}'
+        )
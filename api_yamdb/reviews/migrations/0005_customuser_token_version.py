@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается при смене роли или прав, чтобы отозвать выданные токены.', verbose_name='Версия токенов'),
+        ),
+    ]
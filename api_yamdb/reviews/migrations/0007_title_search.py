@@ -0,0 +1,82 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARDS = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE FUNCTION reviews_title_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+            || setweight(
+                to_tsvector('russian', coalesce(NEW.description, '')), 'B'
+            );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER reviews_title_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update()
+    """,
+    'UPDATE reviews_title SET name = name',
+    'CREATE INDEX reviews_title_search_vector_idx '
+    'ON reviews_title USING gin (search_vector)',
+    # Триграммы по UPPER(name) обслуживают и поиск с опечатками,
+    # и icontains, который Django строит как UPPER(name) LIKE UPPER(%s).
+    'CREATE INDEX reviews_title_name_trgm_idx '
+    'ON reviews_title USING gin (UPPER(name) gin_trgm_ops)',
+    'CREATE INDEX reviews_category_name_trgm_idx '
+    'ON reviews_category USING gin (UPPER(name) gin_trgm_ops)',
+    'CREATE INDEX reviews_genre_name_trgm_idx '
+    'ON reviews_genre USING gin (UPPER(name) gin_trgm_ops)',
+)
+POSTGRES_BACKWARDS = (
+    'DROP INDEX reviews_genre_name_trgm_idx',
+    'DROP INDEX reviews_category_name_trgm_idx',
+    'DROP INDEX reviews_title_name_trgm_idx',
+    'DROP INDEX reviews_title_search_vector_idx',
+    'DROP TRIGGER reviews_title_search_vector_trigger ON reviews_title',
+    'DROP FUNCTION reviews_title_search_vector_update()',
+)
+SQLITE_FORWARDS = (
+    'CREATE VIRTUAL TABLE reviews_title_fts USING fts5(name, description)',
+    'INSERT INTO reviews_title_fts (rowid, name, description) '
+    'SELECT id, name, description FROM reviews_title',
+)
+SQLITE_BACKWARDS = (
+    'DROP TABLE reviews_title_fts',
+)
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, ())
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARDS, SQLITE_FORWARDS),
+            run_for_vendor(POSTGRES_BACKWARDS, SQLITE_BACKWARDS),
+        ),
+    ]
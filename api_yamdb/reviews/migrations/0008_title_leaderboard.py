@@ -0,0 +1,84 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:35
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_leaderboards(apps, schema_editor):
+    # То же, что reviews.leaderboards.rebuild_leaderboards, на моделях
+    # миграции.
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleLeaderboard = apps.get_model('reviews', 'TitleLeaderboard')
+    TitleLeaderboard.objects.bulk_create(
+        [
+            TitleLeaderboard(title_id=title_id)
+            for title_id in Title.objects.values_list('pk', flat=True)
+        ]
+    )
+    totals = Title.objects.aggregate(
+        total=Sum('rating_sum'), count=Sum('rating_count')
+    )
+    mean = totals['total'] / totals['count'] if totals['count'] else 0.0
+    votes = settings.LEADERBOARD_MIN_VOTES
+    TitleLeaderboard.objects.update(weighted_rating=Subquery(
+        Title.objects.filter(pk=OuterRef('title_id')).annotate(
+            weighted=Case(
+                When(rating_count=0, then=None),
+                default=(
+                    (F('rating_sum') + Value(votes * mean))
+                    / (F('rating_count') + Value(float(votes)))
+                ),
+                output_field=models.FloatField(),
+            )
+        ).values('weighted')[:1],
+        output_field=models.FloatField(),
+    ))
+    half_life = settings.TRENDING_HALF_LIFE_DAYS
+    rate = math.log(2) / (half_life * 24 * 60 * 60)
+    exponents = {}
+    for title_id, pub_date in Review.objects.filter(
+        pub_date__gte=timezone.now() - timedelta(days=half_life * 30)
+    ).values_list('title_id', 'pub_date').iterator():
+        exponents.setdefault(title_id, []).append(rate * pub_date.timestamp())
+    leaderboards = []
+    for title_id, values in exponents.items():
+        top = max(values)
+        leaderboards.append(TitleLeaderboard(
+            title_id=title_id,
+            trending=top + math.log(sum(
+                math.exp(value - top) for value in values
+            )),
+        ))
+    TitleLeaderboard.objects.bulk_update(
+        leaderboards, ['trending'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleLeaderboard',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('weighted_rating', models.FloatField(db_index=True, null=True, verbose_name='Взвешенный рейтинг')),
+                ('trending', models.FloatField(db_index=True, default=0, verbose_name='Ключ популярности')),
+            ],
+            options={
+                'verbose_name': 'место в подборках',
+                'verbose_name_plural': 'места в подборках',
+            },
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_score_counts(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    counts = {}
+    for score in range(1, 11):
+        counts[f'score_count_{score}'] = Coalesce(Subquery(
+            Review.objects.filter(title=OuterRef('pk'), score=score)
+            .order_by().values('title')
+            .annotate(count=Count('pk')).values('count')
+        ), 0)
+    Title.objects.filter(rating_count__gt=0).update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_count_1',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «1»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_10',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «10»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_2',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «2»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_3',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «3»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_4',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «4»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_5',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «5»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_6',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «6»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_7',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «7»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_8',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «8»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count_9',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Оценок «9»'),
+        ),
+        migrations.RunPython(fill_score_counts, migrations.RunPython.noop),
+    ]
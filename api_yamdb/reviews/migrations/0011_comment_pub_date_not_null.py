@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_pub_date(apps, schema_editor):
+    # pub_date — ключ курсорной пагинации комментариев; у строк без даты
+    # её заменяет время последнего изменения.
+    Comment = apps.get_model('reviews', 'Comment')
+    Comment.objects.filter(pub_date__isnull=True).update(
+        pub_date=F('updated_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_hidden_objects'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_pub_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='comment',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+    ]
@@ -1,27 +1,18 @@
 import logging
-import sys
 
 import jwt
 from api.methods import text_processor
 from api.validators import validate_year
 from api_yamdb.settings import SECRET_KEY
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from rest_framework_simplejwt.tokens import AccessToken
 
-formatter = logging.Formatter(
-    '%(asctime)s %(levelname)s %(message)s - строка %(lineno)s'
-)
-
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler(sys.stdout)
-logger.addHandler(handler)
-handler.setFormatter(formatter)
-logger.disabled = False
-logger.debug('Логирование из models запущено')
 
 ROLE_CHOICES = (
     ('user', 'Пользователь'),
@@ -29,6 +20,12 @@ ROLE_CHOICES = (
     ('admin', 'Администратор'),
 )
 
+EMAIL_STATUS_CHOICES = (
+    ('pending', 'Ожидает отправки'),
+    ('sent', 'Отправлено'),
+    ('failed', 'Не доставлено'),
+)
+
 
 class CustomUserManager(BaseUserManager):
     def create_superuser(self, username, email, password, **other_fields):
@@ -45,7 +42,7 @@ class CustomUserManager(BaseUserManager):
                 '"is_superuser" суперпользователя должно быть в режиме "True"'
             )
         logger.debug(
-            f'Here are some other fields in parameters: {other_fields}'
+            'Here are some other fields in parameters: %s', other_fields
         )
         if 'role' in other_fields:
             role = other_fields.get('role')
@@ -69,10 +66,10 @@ class CustomUserManager(BaseUserManager):
         password=None,
         **other_fields
     ):
-        logger.debug(f'Got role: {role}')
-        logger.debug(f'Got password: {password}')
-        logger.debug(f'Is_staff: {other_fields.get("is_staff")}')
-        logger.debug(f'Is_superuser: {other_fields.get("is_superuser")}')
+        logger.debug('Got role: %s', role)
+        logger.debug('Got password: %s', password)
+        logger.debug('Is_staff: %s', other_fields.get('is_staff'))
+        logger.debug('Is_superuser: %s', other_fields.get('is_superuser'))
         logger.debug('Create user func was initiated')
         if not email:
             raise ValueError('Необходимо указать email')
@@ -90,20 +87,19 @@ class CustomUserManager(BaseUserManager):
             user.is_staff = True
             user.set_password(password)
         user.save()
-        confirmation_code = user.confirmation_code
-        token = user.token
-        if user.is_superuser is True:
-            first_line = f'Создан суперпользователь {username}.\n'
-        else:
-            first_line = f'Создан пользователь {username}.\n'
-        # при запуске в производство поставить отправку по почте
-        logger.debug(
-            f'{first_line}Его роль: {role}.'
-            f'Его токен: {token}\n'
-            f'Его confirmation_code для обновления токена:\n'
-            f'{confirmation_code}'
-        )
-        logger.debug(f'user_if_staff:{user.is_staff}')
+        # Токен и код подписываются только ради отладочного сообщения.
+        if logger.isEnabledFor(logging.DEBUG):
+            if user.is_superuser is True:
+                first_line = f'Создан суперпользователь {username}.\n'
+            else:
+                first_line = f'Создан пользователь {username}.\n'
+            # при запуске в производство поставить отправку по почте
+            logger.debug(
+                '%sЕго роль: %s.Его токен: %s\n'
+                'Его confirmation_code для обновления токена:\n%s',
+                first_line, role, user.token, user.confirmation_code
+            )
+        logger.debug('user_if_staff:%s', user.is_staff)
         return user
 
 
@@ -132,6 +128,16 @@ class CustomUser(AbstractUser):
         ),
     )
 
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+        help_text=(
+            'Увеличивается при смене роли или прав, '
+            'чтобы отозвать выданные токены.'
+        ),
+    )
+
     objects = CustomUserManager()
 
     class Meta:
@@ -145,8 +151,11 @@ class CustomUser(AbstractUser):
     @property
     def token(self):
         token = AccessToken.for_user(self)
+        token['username'] = self.username
         token['role'] = self.role
+        token['is_staff'] = self.is_staff
         token['is_superuser'] = self.is_superuser
+        token['token_version'] = self.token_version
         return token
 
     @property
@@ -163,7 +172,31 @@ class CustomUser(AbstractUser):
         return confirmation_code
 
 
-class Category(models.Model):
+class HideableModel(models.Model):
+    """Объект, который DELETE в API сначала только скрывает.
+
+    Скрытые объекты не попадают в выборки api, а физически их вместе с
+    зависимыми строками порциями удаляет команда purge_hidden.
+    """
+    is_hidden = models.BooleanField('Скрыт', default=False, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def hide(self):
+        # Через save, чтобы сработали сигналы рейтинга и кэша ответов.
+        self.is_hidden = True
+        self.save(update_fields=('is_hidden', 'updated_at'))
+
+
+def hidden_index(name):
+    """Частичный индекс скрытых строк — очередь purge_hidden."""
+    return models.Index(
+        fields=('id',), name=name, condition=models.Q(is_hidden=True)
+    )
+
+
+class Category(HideableModel):
     name = models.CharField(
         max_length=200,
         verbose_name='Название категории'
@@ -172,11 +205,13 @@ class Category(models.Model):
         unique=True,
         verbose_name='url-адрес категории',
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ('name', )
         verbose_name = 'категория'
         verbose_name_plural = 'категории'
+        indexes = [hidden_index('category_hidden_idx')]
 
     def __str__(self):
         return self.name
@@ -191,6 +226,7 @@ class Genre(models.Model):
         unique=True,
         verbose_name='url-адрес жанра',
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ('name', )
@@ -201,7 +237,21 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+SCORES = range(1, 11)
+
+
+def score_count_field(score):
+    """Поле Title с количеством отзывов с оценкой score."""
+    return f'score_count_{score}'
+
+
+# Поля Title, которые ведут сигналы отзывов запросами с F().
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating') + tuple(
+    score_count_field(score) for score in SCORES
+)
+
+
+class Title(HideableModel):
     name = models.CharField(
         max_length=200,
         verbose_name='Название произведения'
@@ -229,16 +279,121 @@ class Title(models.Model):
         blank=True,
         verbose_name='Категория'
     )
+    # Денормализованный рейтинг: поддерживается сигналами reviews.signals
+    # при создании, изменении и удалении отзывов, сверяется командой
+    # reconcile_ratings.
+    rating_sum = models.IntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.IntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    rating = models.IntegerField(
+        'Рейтинг', null=True, blank=True, editable=False
+    )
+    # Распределение оценок: сколько отзывов поставили каждую из SCORES.
+    # Обновляется тем же запросом, что и рейтинг.
+    score_count_1 = models.IntegerField(
+        'Оценок «1»', default=0, editable=False
+    )
+    score_count_2 = models.IntegerField(
+        'Оценок «2»', default=0, editable=False
+    )
+    score_count_3 = models.IntegerField(
+        'Оценок «3»', default=0, editable=False
+    )
+    score_count_4 = models.IntegerField(
+        'Оценок «4»', default=0, editable=False
+    )
+    score_count_5 = models.IntegerField(
+        'Оценок «5»', default=0, editable=False
+    )
+    score_count_6 = models.IntegerField(
+        'Оценок «6»', default=0, editable=False
+    )
+    score_count_7 = models.IntegerField(
+        'Оценок «7»', default=0, editable=False
+    )
+    score_count_8 = models.IntegerField(
+        'Оценок «8»', default=0, editable=False
+    )
+    score_count_9 = models.IntegerField(
+        'Оценок «9»', default=0, editable=False
+    )
+    score_count_10 = models.IntegerField(
+        'Оценок «10»', default=0, editable=False
+    )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    # Заполняется триггером PostgreSQL из названия и описания;
+    # на SQLite поиск идёт по таблице FTS5 reviews_title_fts.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'произведения'
+        indexes = [hidden_index('title_hidden_idx')]
 
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        # Экземпляр мог быть загружен до нового отзыва: сохранение
+        # существующей строки не перезаписывает рейтинг старыми значениями.
+        if update_fields is None and not force_insert and not (
+            self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in RATING_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(force_insert=force_insert, force_update=force_update,
+                     using=using, update_fields=update_fields)
+
+    @property
+    def visible_category(self):
+        """Категория произведения; скрытая категория не показывается."""
+        if self.category is None or self.category.is_hidden:
+            return None
+        return self.category
+
 
-class Review(models.Model):
+class TitleLeaderboard(models.Model):
+    """Положение произведения в подборках лучших и популярных.
+
+    Строки обновляются сигналами reviews.signals при изменении отзывов и
+    пересчитываются целиком командой refresh_leaderboards; формулы — в
+    reviews.leaderboards.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='leaderboard',
+        verbose_name='Произведение'
+    )
+    # Байесовское среднее: оценки произведения, дополненные
+    # LEADERBOARD_MIN_VOTES средними оценками по всему каталогу.
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг', null=True, db_index=True
+    )
+    # ln Σ exp(λ·t) по отзывам, t — время публикации в секундах. Порядок
+    # по ключу совпадает с порядком по числу отзывов, затухающему с
+    # периодом полураспада TRENDING_HALF_LIFE_DAYS.
+    trending = models.FloatField('Ключ популярности', default=0, db_index=True)
+
+    class Meta:
+        verbose_name = 'место в подборках'
+        verbose_name_plural = 'места в подборках'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.weighted_rating}'
+
+
+class Review(HideableModel):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -252,8 +407,8 @@ class Review(models.Model):
     )
     score = models.IntegerField(
         validators=(
-            MinValueValidator(1),
-            MaxValueValidator(10)),
+            MinValueValidator(SCORES[0]),
+            MaxValueValidator(SCORES[-1])),
         error_messages={'validators': 'Укажите оценку от 1 до 10'},
         verbose_name='Оценка',
     )
@@ -267,20 +422,36 @@ class Review(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
-        # Данная команда не даст повторно голосовать
+        # Данная команда не даст повторно голосовать; скрытый отзыв
+        # не мешает автору написать новый.
         constraints = [
             models.UniqueConstraint(
                 fields=('title', 'author', ),
+                condition=models.Q(is_hidden=False),
                 name='unique_review'
             )]
+        # Ключ курсорной пагинации отзывов произведения
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+            hidden_index('review_hidden_idx'),
+        ]
 
     def __str__(self):
         return text_processor(self.text, 1)
 
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в той же транзакции, что и отзыв.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     title = models.ForeignKey(
@@ -302,12 +473,57 @@ class Comment(models.Model):
     )
     text = models.TextField('Текст комментария', max_length=200)
     pub_date = models.DateTimeField(
-        'Дата публикации', auto_now_add=True, null=True
+        'Дата публикации', auto_now_add=True
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+        # Ключ курсорной пагинации комментариев к отзыву
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return text_processor(self.text, 1)
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди исходящей почты.
+
+    Вью только записывает письмо, а отправляет его команда send_outbox.
+    """
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    to = models.TextField('Получатели', help_text='Адреса через запятую')
+    status = models.CharField(
+        'Статус',
+        choices=EMAIL_STATUS_CHOICES,
+        default='pending',
+        max_length=16
+    )
+    attempts = models.PositiveIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outgoing_email_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to}'
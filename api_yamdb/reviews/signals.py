@@ -0,0 +1,121 @@
+from django.db.models import F
+from django.db.models.functions import NullIf
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .leaderboards import update_leaderboard
+from .models import (CustomUser, Review, Title, TitleLeaderboard,
+                     score_count_field)
+
+# Поля, которые попадают в утверждения токена. Деактивация отдельно
+# проверяется при аутентификации и версию токенов не меняет.
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def update_title_rating(title_id, added=None, removed=None):
+    """Атомарно учитывает появившуюся и исчезнувшую оценку произведения.
+
+    Сдвигает сумму и количество оценок и счётчики распределения. Все
+    выражения UPDATE читают значения строки до изменения, поэтому
+    рейтинг пересчитывается в том же запросе без блокировок и гонок.
+    """
+    if title_id is None or added == removed:
+        return
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    changes = {}
+    if added is not None:
+        changes[score_count_field(added)] = F(score_count_field(added)) + 1
+    if removed is not None:
+        changes[score_count_field(removed)] = (
+            F(score_count_field(removed)) - 1
+        )
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        rating=(
+            (F('rating_sum') + score_delta)
+            / NullIf(F('rating_count') + count_delta, 0)
+        ),
+        updated_at=timezone.now(),
+        **changes
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Запоминает, как отзыв учтён в рейтинге до сохранения.
+
+    Скрытый отзыв в рейтинге не учитывается: его оценку убирает hide(),
+    а последующее физическое удаление рейтинг уже не трогает.
+    """
+    instance._rating_state = None
+    if instance.pk is not None:
+        instance._rating_state = Review.objects.filter(
+            pk=instance.pk, is_hidden=False
+        ).values_list('title_id', 'score', 'pub_date').first()
+
+
+@receiver(post_save, sender=Review)
+def apply_review_score(sender, instance, **kwargs):
+    old_state = getattr(instance, '_rating_state', None)
+    new_state = None
+    if not instance.is_hidden:
+        new_state = (instance.title_id, instance.score, instance.pub_date)
+    if old_state and new_state and old_state[0] == new_state[0]:
+        update_title_rating(
+            instance.title_id, added=new_state[1], removed=old_state[1]
+        )
+        if new_state[1] != old_state[1]:
+            update_leaderboard(instance.title_id)
+        return
+    if old_state is not None:
+        old_title_id, old_score, old_pub_date = old_state
+        update_title_rating(old_title_id, removed=old_score)
+        update_leaderboard(old_title_id, removed=old_pub_date)
+    if new_state is not None:
+        update_title_rating(instance.title_id, added=instance.score)
+        update_leaderboard(instance.title_id, added=instance.pub_date)
+
+
+@receiver(post_delete, sender=Review)
+def revoke_review_score(sender, instance, **kwargs):
+    # Срабатывает и для QuerySet.delete(), и для каскадного удаления:
+    # при наличии обработчика Django отправляет сигнал для каждого отзыва.
+    if instance.is_hidden:
+        return
+    update_title_rating(instance.title_id, removed=instance.score)
+    update_leaderboard(instance.title_id, removed=instance.pub_date)
+
+
+@receiver(post_save, sender=Title)
+def create_leaderboard_entry(sender, instance, created, raw, **kwargs):
+    # Строки для произведений из bulk_create добавляет refresh_leaderboards.
+    if created and not raw:
+        TitleLeaderboard.objects.create(title=instance)
+
+
+@receiver(pre_save, sender=CustomUser)
+def revoke_stale_tokens(sender, instance, **kwargs):
+    """Отзывает токены, если изменились сведения, записанные в них."""
+    if instance.pk is None:
+        return
+    stored = CustomUser.objects.filter(
+        pk=instance.pk
+    ).values(*TOKEN_CLAIM_FIELDS, 'token_version').first()
+    if stored is None:
+        return
+    if any(
+        stored[field] != getattr(instance, field)
+        for field in TOKEN_CLAIM_FIELDS
+    ):
+        instance.token_version = stored['token_version'] + 1
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_token_version(sender, instance, **kwargs):
+    from api.authentication import forget_token_version
+
+    forget_token_version(instance.pk)
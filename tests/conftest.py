@@ -1,9 +1,36 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """Тесты, которым нужна база данных, работают с SQLite в памяти.
+
+    Настройки проекта не меняются: подменяется только словарь баз данных
+    обработчика соединений, поэтому test_settings проверяет боевой конфиг.
+    """
+    from django.db import connections
+
+    connections.__dict__['databases'] = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        # Зеркало основной базы для проверок api.replicas.
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    if hasattr(connections._connections, 'default'):
+        del connections['default']
@@ -0,0 +1,248 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture(autouse=True)
+def clear_throttle_cache(settings):
+    from django.core.cache import caches
+
+    caches[settings.THROTTLE_CACHE_ALIAS].clear()
+    yield
+    caches[settings.THROTTLE_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def api_cache(settings):
+    from django.core.cache import caches
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def authenticate(method, token):
+    from api.authentication import TokenUserAuthentication
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = getattr(APIRequestFactory(), method)(
+        '/api/v1/titles/', HTTP_AUTHORIZATION=f'Bearer {token}'
+    )
+    user, _ = TokenUserAuthentication().authenticate(Request(request))
+    return user
+
+
+def user_selects(queries):
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "reviews_customuser"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestAuthFlow:
+
+    signup_url = '/api/v1/auth/signup/'
+    token_url = '/api/v1/auth/token/'
+
+    def test_signup_checks_user_once(self, client):
+        from reviews.models import CustomUser
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.signup_url, {
+                'username': 'reader', 'email': 'reader@ya.ru'
+            })
+
+        assert response.status_code == 200
+        assert len(user_selects(context.captured_queries)) == 1, (
+            'Проверьте, что занятость username и email проверяется '
+            'одним запросом'
+        )
+        assert not CustomUser.objects.get(username='reader').is_active
+
+    def test_signup_taken(self, client):
+        from reviews.models import CustomUser
+
+        CustomUser.objects.create(username='reader', email='reader@ya.ru')
+        CustomUser.objects.create(username='writer', email='writer@ya.ru')
+
+        response = client.post(self.signup_url, {
+            'username': 'reader', 'email': 'writer@ya.ru'
+        })
+        assert response.status_code == 400
+        assert set(response.json()) == {'username', 'email'}
+        assert client.post(self.signup_url, {
+            'username': 'me', 'email': 'me@ya.ru'
+        }).status_code == 400
+
+    def test_token_activates_once(self, client):
+        from reviews.models import CustomUser
+
+        user = CustomUser.objects.create(
+            username='reader', email='reader@ya.ru', is_active=False
+        )
+        data = {
+            'username': 'reader',
+            'confirmation_code': user.confirmation_code,
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            first = client.post(self.token_url, data)
+        with CaptureQueriesContext(connection) as repeated:
+            second = client.post(self.token_url, data)
+
+        assert first.status_code == second.status_code == 200
+        assert CustomUser.objects.get(pk=user.pk).is_active
+        assert len(user_selects(context.captured_queries)) == 1, (
+            'Проверьте, что пользователь читается один раз за запрос'
+        )
+        assert len(repeated.captured_queries) == 1, (
+            'Проверьте, что повторная выдача токена ничего не пишет в базу'
+        )
+
+    def test_unknown_user(self, client):
+        assert client.post(self.token_url, {
+            'username': 'nobody', 'confirmation_code': 'code'
+        }).status_code == 404
+
+
+@pytest.mark.django_db
+class TestAuthThrottle:
+
+    def test_username_throttle(self, client, monkeypatch):
+        from api.throttling import AuthUsernameThrottle
+
+        monkeypatch.setitem(
+            AuthUsernameThrottle.THROTTLE_RATES, 'auth_username', '2/min'
+        )
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        statuses = [
+            client.post('/api/v1/auth/token/', data).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [404, 404, 429], (
+            'Проверьте, что попытки для одного username ограничены'
+        )
+        assert client.post('/api/v1/auth/token/', {
+            'username': 'other', 'confirmation_code': 'code'
+        }).status_code == 404
+
+    def test_ip_throttle(self, client, monkeypatch):
+        from api.throttling import AuthIPThrottle
+
+        monkeypatch.setitem(
+            AuthIPThrottle.THROTTLE_RATES, 'auth_ip', '2/min'
+        )
+        statuses = [
+            client.post('/api/v1/auth/signup/', {
+                'username': f'user{number}',
+                'email': f'user{number}@ya.ru',
+            }).status_code
+            for number in range(3)
+        ]
+        assert statuses == [200, 200, 429], (
+            'Проверьте, что регистрация с одного IP-адреса ограничена'
+        )
+        with CaptureQueriesContext(connection) as context:
+            client.post('/api/v1/auth/token/', {
+                'username': 'user0', 'confirmation_code': 'code'
+            })
+        assert not context.captured_queries, (
+            'Проверьте, что отклонённые запросы не обращаются к базе'
+        )
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/auth/signup/', '/api/v1/auth/token/'
+    ])
+    @pytest.mark.parametrize('body', ['["reader"]', '5', '"reader"'])
+    def test_non_object_body_is_400(self, client, url, body):
+        assert client.post(
+            url, body, content_type='application/json'
+        ).status_code == 400, (
+            'Проверьте, что тело запроса не в виде объекта отклоняется '
+            'статусом 400, а не ошибкой сервера'
+        )
+
+@pytest.mark.django_db
+class TestTokenAuthentication:
+
+    @pytest.fixture
+    def user(self, api_cache):
+        from reviews.models import CustomUser
+
+        return CustomUser.objects.create(
+            username='reader', email='reader@ya.ru', role='moderator'
+        )
+
+    def assert_rejected(self, token, code):
+        from rest_framework.exceptions import AuthenticationFailed
+
+        for method in ('get', 'post'):
+            with pytest.raises(AuthenticationFailed) as error:
+                authenticate(method, token)
+            if code is not None:
+                assert error.value.detail['code'] == code
+
+    def test_safe_method_uses_claims(self, user):
+        from api.authentication import LazyTokenUser
+
+        token = user.token
+        authenticate('get', token)
+        with CaptureQueriesContext(connection) as context:
+            lazy = authenticate('get', token)
+
+        assert isinstance(lazy, LazyTokenUser)
+        assert (lazy.id, lazy.username, lazy.role, lazy.is_staff) == (
+            user.id, 'reader', 'moderator', False
+        )
+        assert not context.captured_queries, (
+            'Проверьте, что GET-запрос с известной версией токенов '
+            'не читает пользователя из базы'
+        )
+        assert lazy.email == 'reader@ya.ru'
+
+    def test_unsafe_method_loads_user(self, user):
+        from reviews.models import CustomUser
+
+        with CaptureQueriesContext(connection) as context:
+            loaded = authenticate('post', user.token)
+
+        assert type(loaded) is CustomUser
+        assert loaded.pk == user.pk
+        assert len(user_selects(context.captured_queries)) == 1
+
+    def test_role_change_revokes_token(self, user):
+        token = user.token
+        authenticate('get', token)
+
+        user.role = 'user'
+        user.save()
+
+        self.assert_rejected(token, 'token_revoked')
+        assert authenticate('get', user.token).role == 'user'
+
+    def test_deactivated_user_is_rejected(self, user):
+        token = user.token
+        authenticate('get', token)
+
+        user.is_active = False
+        user.save()
+
+        self.assert_rejected(token, None)
+
+    def test_token_without_new_claims(self, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken.for_user(user)
+        assert 'token_version' not in token and 'role' not in token
+
+        lazy = authenticate('get', token)
+        assert lazy.role == 'moderator', (
+            'Проверьте, что роль из старого токена читается из базы'
+        )
+        assert authenticate('post', token).pk == user.pk
+
+        user.role = 'admin'
+        user.save()
+        self.assert_rejected(token, 'token_revoked')
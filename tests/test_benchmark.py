@@ -0,0 +1,55 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def dataset(self):
+        call_command(
+            'generate_dataset', users=10, categories=2, genres=3, titles=10,
+            reviews=30, comments=30, stdout=StringIO()
+        )
+
+    def run(self, **options):
+        call_command(
+            'benchmark', requests=3, warmup=1, stdout=StringIO(),
+            stderr=StringIO(), **options
+        )
+
+    def test_report(self, tmp_path):
+        from reviews.models import CustomUser
+
+        users = CustomUser.objects.count()
+        output = tmp_path / 'benchmark.json'
+        self.run(output=str(output))
+
+        report = json.loads(output.read_text(encoding='utf-8'))
+        endpoints = {result['name']: result for result in report['endpoints']}
+        assert {'titles', 'title', 'reviews', 'comments', 'signup', 'token',
+                'users-me'} <= set(endpoints)
+        for result in endpoints.values():
+            assert result['errors'] == 0, (
+                f'Проверьте, что эндпойнт {result["name"]} отвечает без ошибок'
+            )
+            assert result['requests'] == 3
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+            assert result['queries'] > 0
+        assert CustomUser.objects.count() == users, (
+            'Проверьте, что benchmark откатывает созданные данные'
+        )
+
+    def test_baseline_regression(self, tmp_path):
+        output = tmp_path / 'benchmark.json'
+        self.run(output=str(output), only=['title'])
+        report = json.loads(output.read_text(encoding='utf-8'))
+        report['endpoints'][0]['queries'] = 0
+        output.write_text(json.dumps(report), encoding='utf-8')
+
+        with pytest.raises(CommandError):
+            self.run(baseline=str(output), only=['title'], max_slowdown=100)
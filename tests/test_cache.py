@@ -0,0 +1,165 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache(settings):
+    caches[settings.API_CACHE_ALIAS].clear()
+    yield
+    caches[settings.API_CACHE_ALIAS].clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    url = '/api/v1/titles/'
+
+    def test_repeated_list_skips_database(self, client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Произведение', year=2000)
+        first = client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            second = client.get(self.url)
+
+        assert second.json() == first.json()
+        assert not context.captured_queries, (
+            'Проверьте, что повторный запрос списка произведений '
+            'обслуживается из кэша без обращения к базе данных'
+        )
+
+    def test_query_string_is_part_of_key(self, client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Первое', year=2000)
+        Title.objects.create(name='Второе', year=2000)
+
+        assert client.get(self.url).json()['count'] == 2
+        assert client.get(f'{self.url}?name=Перв').json()['count'] == 1, (
+            'Проверьте, что параметры фильтрации входят в ключ кэша'
+        )
+
+    def test_invalidation_by_signals(self, client):
+        from reviews.models import Category, CustomUser, Review, Title
+
+        category = Category.objects.create(name='Книги', slug='books')
+        title = Title.objects.create(
+            name='Произведение', year=2000, category=category
+        )
+        client.get(self.url)
+
+        Title.objects.create(name='Новое', year=2000)
+        assert client.get(self.url).json()['count'] == 2, (
+            'Проверьте, что создание произведения сбрасывает кэш списка'
+        )
+
+        category.name = 'Фильмы'
+        category.save()
+        detail = client.get(f'{self.url}{title.id}/').json()
+        assert detail['category']['name'] == 'Фильмы', (
+            'Проверьте, что изменение категории сбрасывает кэш произведений'
+        )
+
+        user = CustomUser.objects.create(username='user', email='u@ya.ru')
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        detail = client.get(f'{self.url}{title.id}/').json()
+        assert detail['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш рейтинга'
+        )
+
+    def test_invalidation_waits_for_commit(self, client):
+        from api.cache import get_versions
+        from reviews.models import Title
+
+        Title.objects.create(name='Первое', year=2000)
+        client.get(self.url)
+        before = get_versions('titles')
+
+        with transaction.atomic():
+            Title.objects.create(name='Второе', year=2000)
+            assert get_versions('titles') == before, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции: иначе параллельный запрос закэширует старые '
+                'данные под новой версией'
+            )
+        assert get_versions('titles') != before
+        assert client.get(self.url).json()['count'] == 2
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Title.objects.create(name='Третье', year=2000)
+                raise RuntimeError
+        assert client.get(self.url).json()['count'] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_list_not_modified(self, client):
+        from reviews.models import Category
+
+        Category.objects.create(name='Книги', slug='books')
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+
+        with CaptureQueriesContext(connection) as context:
+            repeated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert repeated.status_code == 304, (
+            f'Проверьте, что `{url}` отвечает 304 на совпадающий If-None-Match'
+        )
+        assert not context.captured_queries
+
+        repeated = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert repeated.status_code == 304
+
+        Category.objects.create(name='Фильмы', slug='movies')
+        changed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert changed.status_code == 200, (
+            'Проверьте, что ETag списка меняется после изменения данных'
+        )
+
+    def test_detail_not_modified(self, client):
+        from reviews.models import CustomUser, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+
+        Title.objects.create(name='Другое', year=2000)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что ETag произведения не зависит от других произведений'
+        )
+
+        user = CustomUser.objects.create(username='user', email='u@ya.ru')
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag произведения'
+        )
+
+    def test_revalidation_after_commit(self, client):
+        from reviews.models import Category
+
+        category = Category.objects.create(name='Книги', slug='books')
+        url = '/api/v1/categories/'
+        etag = client.get(url)['ETag']
+
+        with transaction.atomic():
+            category.name = 'Фильмы'
+            category.save()
+        changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200, (
+            'Проверьте, что после фиксации изменения ETag списка меняется'
+        )
+        assert changed.json()['results'] == [
+            {'name': 'Фильмы', 'slug': 'books'}
+        ], 'Проверьте, что после фиксации отдаются новые данные'
+        assert changed['ETag'] != etag
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=changed['ETag']
+        ).status_code == 304
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+def stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    url = '/api/v1/export/'
+
+    @pytest.fixture
+    def admin_client(self, client):
+        from reviews.models import CustomUser
+
+        admin = CustomUser.objects.create(
+            username='admin', email='admin@ya.ru', role='admin'
+        )
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {admin.token}'
+        client.admin = admin
+        return client
+
+    @pytest.fixture
+    def catalog(self):
+        from reviews.models import Category, Genre, Title
+
+        books = Category.objects.create(name='Книги', slug='books')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        first = Title.objects.create(name='Первое', year=2000, category=books)
+        first.genre.set([drama, comedy])
+        second = Title.objects.create(name='Второе', year=2001)
+        third = Title.objects.create(name='Третье', year=2002)
+        third.genre.set([drama])
+        return first, second, third
+
+    def test_only_admin(self, client):
+        response = client.get(f'{self.url}titles.ndjson')
+        assert response.status_code == 401, (
+            'Проверьте, что выгрузка недоступна анонимному пользователю'
+        )
+
+    def test_titles_ndjson(self, admin_client, catalog):
+        from reviews.models import Review
+
+        first, second, third = catalog
+        Review.objects.create(
+            title=first, author=admin_client.admin, text='Да', score=7
+        )
+        response = admin_client.get(f'{self.url}titles.ndjson')
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        )
+        rows = [json.loads(line) for line in stream(response).splitlines()]
+        assert rows == [
+            {'id': first.id, 'name': 'Первое', 'year': 2000,
+             'description': '', 'category': 'books',
+             'genre': ['comedy', 'drama'], 'rating': 7},
+            {'id': second.id, 'name': 'Второе', 'year': 2001,
+             'description': '', 'category': None, 'genre': [],
+             'rating': None},
+            {'id': third.id, 'name': 'Третье', 'year': 2002,
+             'description': '', 'category': None, 'genre': ['drama'],
+             'rating': None},
+        ]
+
+    def test_reviews_csv_for_title_range(self, admin_client, catalog):
+        from reviews.models import Review
+
+        first, second, third = catalog
+        for title in catalog:
+            Review.objects.create(
+                title=title, author=admin_client.admin, text='Да', score=5
+            )
+        response = admin_client.get(
+            f'{self.url}reviews.csv?title_min={second.id}'
+            f'&title_max={third.id}'
+        )
+        rows = list(csv.DictReader(io.StringIO(stream(response))))
+        assert [int(row['title_id']) for row in rows] == [
+            second.id, third.id
+        ], 'Проверьте, что title_min и title_max ограничивают выгрузку'
+        assert rows[0]['author'] == 'admin'
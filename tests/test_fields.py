@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def title():
+    from reviews.models import Category, CustomUser, Genre, Review, Title
+
+    category = Category.objects.create(name='Фильмы', slug='films')
+    title = Title.objects.create(name='Произведение', year=2000,
+                                 description='Длинное описание',
+                                 category=category)
+    title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+    for number in range(3):
+        author = CustomUser.objects.create(username=f'user{number}',
+                                           email=f'user{number}@ya.ru')
+        Review.objects.create(title=title, author=author,
+                              text='Текст отзыва', score=number + 5)
+    return title
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), ' '.join(
+        query['sql'] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_titles_fields_prune_query(self, client, title):
+        data, sql = get_with_queries(client, '/api/v1/titles/?fields=id,name')
+        assert data['results'] == [{'id': title.id, 'name': 'Произведение'}]
+        assert 'reviews_genre' not in sql, (
+            'Проверьте, что жанры не загружаются, если их нет в ответе'
+        )
+        assert 'JOIN "reviews_category"' not in sql
+        assert '"description"' not in sql
+
+        data, sql = get_with_queries(
+            client, '/api/v1/titles/?exclude=description,rating'
+        )
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'genre', 'category'
+        }
+        assert data['results'][0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ], 'Проверьте, что вложенные объекты отдаются целиком'
+        assert '"description"' not in sql
+
+    def test_title_detail_and_leaderboard(self, client, title):
+        from django.core.management import call_command
+
+        url = f'/api/v1/titles/{title.id}/?fields=id,scores'
+        data, sql = get_with_queries(client, url)
+        assert set(data) == {'id', 'scores'}
+        assert 'reviews_genre' not in sql
+
+        call_command('refresh_leaderboards', stdout=None)
+        data, sql = get_with_queries(
+            client, '/api/v1/titles/trending/?fields=id,trending'
+        )
+        assert [set(item) for item in data['results']] == [{'id', 'trending'}]
+
+    def test_reviews_fields(self, client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        data, sql = get_with_queries(client, f'{url}?fields=id,score')
+        assert sorted(review['score'] for review in data['results']) == [
+            5, 6, 7
+        ]
+        assert set(data['results'][0]) == {'id', 'score'}
+        assert 'reviews_customuser' not in sql
+        assert '"text"' not in sql
+
+        data, sql = get_with_queries(
+            client, f'{url}?fields=score&pagination=cursor'
+        )
+        assert [set(review) for review in data['results']] == [{'score'}] * 3
+
+    def test_unknown_field_is_400(self, client, title):
+        response = client.get('/api/v1/titles/?fields=id,secret&exclude=x')
+        assert response.status_code == 400
+        assert response.json() == {
+            'fields': ['Неизвестные поля: secret.'],
+            'exclude': ['Неизвестные поля: x.'],
+        }
+
+    def test_write_ignores_fields(self, client, title):
+        from reviews.models import CustomUser
+
+        author = CustomUser.objects.create(username='author', email='a@ya.ru')
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {author.token}'
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 9}
+        )
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Отзыв'
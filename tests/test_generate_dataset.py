@@ -0,0 +1,96 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def generate(**options):
+    output = StringIO()
+    call_command(
+        'generate_dataset', **{
+            'users': 20, 'categories': 3, 'genres': 5, 'titles': 30,
+            'reviews': 200, 'comments': 300, **options
+        }, stdout=output
+    )
+    return output.getvalue()
+
+
+def clear():
+    from reviews.models import Category, CustomUser, Genre, Review, Title
+
+    for model in (Review, Title, Category, Genre, CustomUser):
+        model.objects.all().delete()
+
+
+def snapshot():
+    from reviews.models import Comment, Review, Title
+
+    return (
+        list(Title.objects.order_by('pk').values_list(
+            'pk', 'name', 'category_id', 'rating'
+        )),
+        list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author_id', 'score', 'pub_date'
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'review_id', 'author_id', 'pub_date'
+        )),
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateDataset:
+
+    def test_counts_and_ratings(self):
+        from django.db.models import Count
+        from reviews.models import Comment, CustomUser, Review, Title
+
+        generate()
+
+        assert CustomUser.objects.count() == 20
+        assert Title.objects.count() == 30
+        assert Review.objects.count() == 200
+        assert Comment.objects.count() == 300
+        counts = list(
+            Title.objects.annotate(total=Count('reviews'))
+            .order_by('pk').values_list('total', flat=True)
+        )
+        assert counts[0] > counts[-1], (
+            'Проверьте, что у первых произведений больше отзывов'
+        )
+        drifted = StringIO()
+        call_command('reconcile_ratings', dry_run=True, stdout=drifted)
+        assert 'расхождений: 0' in drifted.getvalue(), (
+            'Проверьте, что после генерации рейтинги пересчитаны'
+        )
+
+    def test_same_seed_same_data(self):
+        generate(seed=7)
+        first = snapshot()
+        clear()
+        generate(seed=7)
+
+        assert snapshot() == first, (
+            'Проверьте, что при одинаковом seed данные совпадают'
+        )
+
+    def test_batch_size_does_not_change_data(self):
+        generate(seed=7)
+        first = snapshot()
+        clear()
+        generate(seed=7, batch_size=7)
+
+        assert snapshot() == first, (
+            'Проверьте, что --batch-size не влияет на сгенерированные данные'
+        )
+
+    def test_reviews_capped_by_users(self):
+        from reviews.models import Review
+
+        output = generate(users=2, titles=3, reviews=10, comments=0)
+
+        assert Review.objects.count() == 6
+        assert 'review: создано 6 из 10' in output, (
+            'Проверьте, что команда сообщает, сколько отзывов создано на '
+            'самом деле'
+        )
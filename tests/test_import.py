@@ -0,0 +1,150 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+USERS = [
+    {'id': 1, 'username': 'reader', 'email': 'reader@ya.ru'},
+    {'id': 2, 'username': 'writer', 'email': 'writer@ya.ru',
+     'role': 'moderator'},
+]
+TITLES = [
+    {'id': 1, 'name': 'Фильм', 'year': 2000, 'category': 'films'},
+    {'id': 2, 'name': 'Книга', 'year': 1869, 'category': ''},
+]
+REVIEWS = [
+    {'id': 1, 'title_id': 1, 'text': 'Отзыв', 'author': 'reader',
+     'score': 8, 'pub_date': '2020-01-01T00:00:00Z'},
+    {'id': 2, 'title_id': 1, 'text': 'Отзыв', 'author': 'writer',
+     'score': 3, 'pub_date': '2020-01-02T00:00:00Z'},
+]
+
+
+def write_csv(directory, name, rows):
+    header = list(rows[0])
+    lines = [','.join(header)] + [
+        ','.join(str(row.get(column, '')) for column in header)
+        for row in rows
+    ]
+    (directory / f'{name}.csv').write_text(
+        '\n'.join(lines) + '\n', encoding='utf-8'
+    )
+
+
+def write_ndjson(directory, name, rows):
+    (directory / f'{name}.ndjson').write_text(
+        ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows),
+        encoding='utf-8'
+    )
+
+
+def import_yamdb(directory, **options):
+    output = StringIO()
+    call_command('import_yamdb', str(directory), stdout=output, **options)
+    return output.getvalue()
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    write_csv(tmp_path, 'users', USERS)
+    write_csv(tmp_path, 'category', [{'name': 'Фильмы', 'slug': 'films'}])
+    write_ndjson(tmp_path, 'genre', [{'name': 'Драма', 'slug': 'drama'}])
+    write_ndjson(tmp_path, 'titles', TITLES)
+    write_csv(tmp_path, 'genre_title', [{'title_id': 1, 'genre': 'drama'}])
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestImportYamdb:
+
+    def test_csv_and_ndjson(self, catalog):
+        from reviews.models import Comment, Review, Title
+
+        write_csv(catalog, 'review', REVIEWS)
+        write_ndjson(catalog, 'comments', [
+            {'id': 1, 'review_id': 2, 'text': 'Комментарий',
+             'author': 'reader'},
+        ])
+
+        output = import_yamdb(catalog)
+
+        film = Title.objects.get(pk=1)
+        assert film.category.slug == 'films'
+        assert list(film.genre.values_list('slug', flat=True)) == ['drama']
+        assert Title.objects.get(pk=2).category is None
+        assert Review.objects.get(pk=2).author.username == 'writer'
+        assert Comment.objects.get().author.username == 'reader'
+        assert (film.rating_sum, film.rating_count, film.rating) == (
+            11, 2, 5
+        ), 'Проверьте, что после импорта пересчитываются рейтинги'
+        assert (film.score_count_8, film.score_count_3) == (1, 1)
+        assert film.leaderboard.weighted_rating is not None
+        assert 'review: загружено 2, пропущено из-за конфликтов 0' in output
+
+    def test_conflicts_are_reported(self, catalog):
+        from reviews.models import Review
+
+        write_csv(catalog, 'review', REVIEWS + [
+            {**REVIEWS[0], 'id': 3, 'score': 1},
+        ])
+
+        output = import_yamdb(catalog, batch_size=2)
+
+        assert set(Review.objects.values_list('pk', flat=True)) == {1, 2}
+        assert 'review: загружено 2, пропущено из-за конфликтов 1' in output
+        assert 'users: загружено 2, пропущено из-за конфликтов 0' in output
+
+        output = import_yamdb(catalog)
+        assert 'users: загружено 0, пропущено из-за конфликтов 2' in output, (
+            'Проверьте, что повторно загруженные строки не считаются '
+            'загруженными'
+        )
+
+    def test_resume_after_error(self, catalog):
+        from reviews.models import Review, Title
+
+        write_csv(catalog, 'review', REVIEWS + [
+            {**REVIEWS[0], 'id': 3, 'author': 'nobody'},
+        ])
+        with pytest.raises(CommandError, match='nobody'):
+            import_yamdb(catalog, batch_size=1)
+        assert Review.objects.count() == 2
+        state = json.loads((catalog / '.import_state').read_text())
+        assert state['review'] == 2
+
+        write_csv(catalog, 'review', REVIEWS + [
+            {**REVIEWS[0], 'id': 3, 'title_id': 2},
+        ])
+        output = import_yamdb(catalog, batch_size=1, resume=True)
+
+        assert 'users:' not in output, (
+            'Проверьте, что --resume не перечитывает загруженные файлы'
+        )
+        assert 'review: загружено 1, пропущено из-за конфликтов 0' in output
+        assert Review.objects.count() == 3
+        assert Title.objects.get(pk=2).rating == 8
+        assert not (catalog / '.import_state').exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_missing_reference_names_rows(self, catalog):
+        from reviews.models import Review
+
+        write_csv(catalog, 'review', REVIEWS + [
+            {**REVIEWS[0], 'id': 3, 'title_id': 99},
+        ])
+        with pytest.raises(CommandError, match='review.csv, строки 3–3'):
+            import_yamdb(catalog, batch_size=2)
+        assert Review.objects.count() == 2, (
+            'Проверьте, что порции до ошибочной остаются загруженными'
+        )
+
+    @pytest.mark.parametrize('score', [0, 11, 'x'])
+    def test_score_out_of_range(self, catalog, score):
+        from reviews.models import Review
+
+        write_csv(catalog, 'review', [{**REVIEWS[0], 'score': score}])
+        with pytest.raises(CommandError, match='от 1 до 10'):
+            import_yamdb(catalog)
+        assert not Review.objects.exists()
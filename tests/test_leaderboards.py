@@ -0,0 +1,131 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture(autouse=True)
+def clear_mean_score():
+    from api.cache import get_cache
+
+    get_cache().clear()
+
+
+@pytest.fixture
+def users():
+    from reviews.models import CustomUser
+
+    return [
+        CustomUser.objects.create(username=f'user{number}',
+                                  email=f'user{number}@ya.ru')
+        for number in range(12)
+    ]
+
+
+def add_reviews(title, users, *scores):
+    from reviews.models import Review
+
+    for user, score in zip(users, scores):
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=score)
+
+
+def stored_keys():
+    from reviews.models import TitleLeaderboard
+
+    return dict(TitleLeaderboard.objects.values_list('title_id', 'trending'))
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_top_uses_weighted_rating(self, client, users):
+        from reviews.models import Category, Title
+
+        films = Category.objects.create(name='Фильмы', slug='films')
+        many = Title.objects.create(name='Много', year=2000, category=films)
+        single = Title.objects.create(name='Одна', year=2000, category=films)
+        Title.objects.create(name='Без отзывов', year=2000, category=films)
+        low = Title.objects.create(name='Низкие', year=2000)
+        add_reviews(many, users, *[9] * 12)
+        add_reviews(single, users, 10)
+        add_reviews(low, users, *[3] * 12)
+        call_command('refresh_leaderboards', stdout=None)
+
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [
+            many.id, single.id, low.id
+        ], (
+            'Проверьте, что единственная десятка не обгоняет много девяток, '
+            'а произведения без отзывов в подборку не попадают'
+        )
+        assert results[0]['rating'] == 9
+        assert 7 < results[0]['weighted_rating'] < 9
+
+        filtered = client.get('/api/v1/titles/top/?category=films').json()
+        assert [title['id'] for title in filtered['results']] == [
+            many.id, single.id
+        ]
+
+    def test_mean_score_ignores_hidden_titles(self, users):
+        from reviews.leaderboards import mean_score
+        from reviews.models import Title
+
+        shown = Title.objects.create(name='Видимое', year=2000)
+        hidden = Title.objects.create(name='Скрытое', year=2000)
+        add_reviews(shown, users, 8, 6)
+        add_reviews(hidden, users, 1, 1)
+        hidden.hide()
+
+        assert mean_score(refresh=True) == 7, (
+            'Проверьте, что средняя оценка каталога не учитывает скрытые '
+            'произведения'
+        )
+
+    def test_trending_prefers_recent_reviews(self, client, users):
+        from django.utils import timezone
+        from reviews.models import Review, Title
+
+        recent = Title.objects.create(name='Новое', year=2000)
+        old = Title.objects.create(name='Старое', year=2000)
+        add_reviews(recent, users, *[5] * 3)
+        add_reviews(old, users, *[5] * 10)
+        Review.objects.filter(title=old).update(
+            pub_date=timezone.now() - timezone.timedelta(days=28)
+        )
+        call_command('refresh_leaderboards', stdout=None)
+
+        results = client.get('/api/v1/titles/trending/').json()['results']
+        assert [title['id'] for title in results] == [recent.id, old.id]
+        assert results[0]['trending'] == pytest.approx(3, abs=0.01)
+        assert results[1]['trending'] == pytest.approx(10 / 16, abs=0.01), (
+            'Проверьте, что вклад отзыва затухает вдвое за '
+            'TRENDING_HALF_LIFE_DAYS'
+        )
+
+    def test_signals_match_rebuild(self, users):
+        from reviews.models import Review, Title, TitleLeaderboard
+
+        first = Title.objects.create(name='Первое', year=2000)
+        second = Title.objects.create(name='Второе', year=2000)
+        assert TitleLeaderboard.objects.count() == 2, (
+            'Проверьте, что у нового произведения появляется строка подборки'
+        )
+        add_reviews(first, users, 7, 8, 9)
+        add_reviews(second, users[5:], 4)
+        Review.objects.filter(author=users[0]).delete()
+        moved = Review.objects.get(title=first, author=users[1])
+        moved.title = second
+        moved.save()
+        Review.objects.filter(title=second, author=users[5]).delete()
+
+        incremental = stored_keys()
+        call_command('refresh_leaderboards', stdout=None)
+        rebuilt = stored_keys()
+        assert incremental[first.id] == pytest.approx(rebuilt[first.id])
+        assert incremental[second.id] == pytest.approx(rebuilt[second.id])
+
+        Review.objects.all().delete()
+        assert TitleLeaderboard.objects.filter(
+            weighted_rating__isnull=False
+        ).count() == 0
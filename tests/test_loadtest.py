@@ -0,0 +1,28 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_report(live_server, tmp_path):
+    from reviews.models import Title
+
+    first = Title.objects.create(name='Первое', year=2000)
+    Title.objects.create(name='Второе', year=2000)
+    output = tmp_path / 'loadtest.json'
+
+    call_command(
+        'loadtest', f'{live_server.url}/api/v1/titles/{{n}}/',
+        concurrency=2, requests=3, start=first.pk, output=str(output),
+        stdout=StringIO()
+    )
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['requests'] == 3
+    assert report['statuses'] == {'200': 2, '404': 1}, (
+        'Проверьте, что {n} в адресе заменяется номером запроса'
+    )
+    assert report['errors'] == 1
+    assert report['p50_ms'] <= report['p95_ms'] <= report['p99_ms']
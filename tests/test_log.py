@@ -0,0 +1,59 @@
+import logging
+import threading
+from io import StringIO
+
+import pytest
+
+
+@pytest.fixture
+def handler():
+    from api_yamdb.log import BackgroundStreamHandler
+
+    handler = BackgroundStreamHandler(StringIO())
+    handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    logger = logging.getLogger('tests.log')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler
+    logger.removeHandler(handler)
+    handler.close()
+
+
+def test_record_reaches_stream(handler):
+    data = {'username': 'reader'}
+    logging.getLogger('tests.log').info('Данные запроса: %s', data)
+    data['username'] = 'changed'
+    handler.stop()
+
+    assert handler.target.stream.getvalue() == (
+        "INFO Данные запроса: {'username': 'reader'}\n"
+    ), 'Проверьте, что аргументы подставляются в момент записи в лог'
+
+
+def test_listener_starts_once(handler, monkeypatch):
+    from logging.handlers import QueueListener
+
+    started = []
+    start = QueueListener.start
+
+    def counting_start(self):
+        started.append(self)
+        start(self)
+
+    monkeypatch.setattr(QueueListener, 'start', counting_start)
+    record = logging.makeLogRecord({'msg': 'Запись', 'levelno': 20})
+    barrier = threading.Barrier(8)
+
+    def emit():
+        barrier.wait()
+        handler.emit(record)
+
+    threads = [threading.Thread(target=emit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    handler.stop()
+
+    assert len(started) == 1
+    assert handler.target.stream.getvalue().count('Запись') == 8
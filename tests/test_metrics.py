@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def metrics(settings, tmp_path):
+    from api.metrics import registry
+
+    settings.METRICS_TOKEN = 'secret'
+    settings.METRICS_DIR = str(tmp_path)
+    registry.counters.clear()
+    registry.histograms.clear()
+    yield tmp_path
+    registry.counters.clear()
+    registry.histograms.clear()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    url = '/metrics'
+
+    def test_requires_token(self, client, metrics):
+        assert client.get(self.url).status_code == 401
+        assert client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code == 401
+
+    def test_disabled_without_token(self, client, settings):
+        settings.METRICS_TOKEN = ''
+        assert client.get(self.url).status_code == 404
+
+    def test_route_metrics(self, client, metrics):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/100500/')
+
+        body = client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        assert (
+            'yamdb_requests_total{route="titles-list",method="GET",'
+            'status="200"} 2'
+        ) in body, 'Проверьте, что запросы считаются по имени маршрута'
+        assert (
+            'yamdb_requests_total{route="titles-detail",method="GET",'
+            'status="404"} 1'
+        ) in body
+        assert (
+            'yamdb_request_duration_seconds_count{route="titles-list",'
+            'method="GET"} 2'
+        ) in body
+        assert 'yamdb_request_db_queries_bucket{route="titles-list"' in body
+        assert 'yamdb_response_size_bytes_sum{route="titles-list"' in body
+
+    def test_workers_are_summed(self, client, metrics):
+        client.get('/api/v1/titles/')
+        (metrics / '1.json').write_text(json.dumps({
+            'counters': [[
+                'yamdb_requests_total',
+                [['route', 'titles-list'], ['method', 'GET'],
+                 ['status', '200']],
+                5,
+            ]],
+            'histograms': [],
+        }), encoding='utf-8')
+
+        body = client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        assert (
+            'yamdb_requests_total{route="titles-list",method="GET",'
+            'status="200"} 6'
+        ) in body, (
+            'Проверьте, что /metrics складывает метрики всех воркеров'
+        )
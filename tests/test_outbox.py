@@ -0,0 +1,114 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.fixture
+def emails():
+    from reviews.models import OutgoingEmail
+
+    return [
+        OutgoingEmail.objects.create(
+            subject=f'Письмо {number}', body='Текст',
+            from_email='yamdb@ya.ru', to=f'user{number}@ya.ru'
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def broken_smtp(monkeypatch):
+    from django.core.mail.backends.locmem import EmailBackend
+
+    def send_messages(self, messages):
+        raise SMTPException('Сервер недоступен')
+
+    monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+
+
+def send_outbox(**options):
+    call_command('send_outbox', once=True, backoff=30, stdout=None,
+                 **options)
+
+
+def make_due(email):
+    from reviews.models import OutgoingEmail
+
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        next_attempt_at=timezone.now()
+    )
+
+
+@pytest.mark.django_db
+class TestSendOutbox:
+
+    def test_drains_queue(self, mailoutbox, emails):
+        from reviews.models import OutgoingEmail
+
+        # pytest-django подставляет EMAIL_BACKEND locmem.
+        send_outbox(batch_size=2)
+
+        assert sorted(message.to[0] for message in mailoutbox) == [
+            email.to for email in emails
+        ]
+        assert set(OutgoingEmail.objects.values_list(
+            'status', 'attempts'
+        )) == {('sent', 1)}
+        send_outbox()
+        assert len(mailoutbox) == len(emails), (
+            'Проверьте, что отправленные письма не отправляются повторно'
+        )
+
+    def test_retries_with_backoff_then_gives_up(self, emails, broken_smtp):
+        from reviews.models import OutgoingEmail
+
+        email = emails[0]
+        OutgoingEmail.objects.exclude(pk=email.pk).delete()
+        delays = []
+        for _ in range(3):
+            started = timezone.now()
+            send_outbox(max_attempts=3)
+            email.refresh_from_db()
+            delays.append(
+                (email.next_attempt_at - started).total_seconds()
+            )
+            make_due(email)
+
+        assert email.attempts == 3
+        assert email.status == 'failed'
+        assert 'Сервер недоступен' in email.last_error
+        assert [round(delay) for delay in delays] == [30, 60, 120], (
+            'Проверьте, что пауза между попытками удваивается'
+        )
+        send_outbox(max_attempts=3)
+        email.refresh_from_db()
+        assert email.attempts == 3, (
+            'Проверьте, что недоставленное письмо больше не отправляется'
+        )
+
+    def test_expired_lease_is_claimed_again(self, monkeypatch, mailoutbox,
+                                            emails):
+        from reviews.management.commands import send_outbox as module
+        from reviews.models import OutgoingEmail
+
+        # Воркер забрал порцию и упал, не отправив её.
+        worker = module.Command()
+        worker.options = {'batch_size': 10, 'lease': 300}
+        assert len(worker.claim_batch()) == len(emails)
+
+        send_outbox()
+        assert not mailoutbox, (
+            'Проверьте, что письма под арендой не берут другие воркеры'
+        )
+
+        later = timezone.now() + timedelta(seconds=301)
+        monkeypatch.setattr(
+            module, 'timezone', SimpleNamespace(now=lambda: later)
+        )
+        send_outbox()
+        assert len(mailoutbox) == len(emails)
+        assert not OutgoingEmail.objects.filter(status='pending').exists()
@@ -0,0 +1,125 @@
+import pytest
+
+
+@pytest.fixture
+def titles():
+    from reviews.models import Title
+
+    return [
+        Title.objects.create(name=f'Произведение {number}', year=2000)
+        for number in range(12)
+    ]
+
+
+@pytest.fixture
+def estimate(monkeypatch, settings):
+    """Подставляет оценку планировщика, которой нет у SQLite."""
+    settings.ESTIMATED_COUNT_THRESHOLD = 3
+
+    def set_estimate(value):
+        monkeypatch.setattr(
+            'api.pagination.estimate_count', lambda queryset: value
+        )
+    return set_estimate
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEstimatedCountPagination:
+
+    def test_large_estimate_replaces_count(self, client, titles, estimate):
+        # Планировщик ошибся в меньшую сторону: страницы за оценкой
+        # всё равно доступны, а конец списка определяется по данным.
+        estimate(4)
+
+        first = client.get('/api/v1/titles/').json()
+        assert (first['count'], first['count_estimated']) == (4, True)
+        assert first['next'].endswith('?page=2')
+
+        last = client.get('/api/v1/titles/?page=3').json()
+        assert [title['id'] for title in last['results']] == [
+            title.id for title in titles[10:]
+        ]
+        assert last['next'] is None
+        assert last['previous'].endswith('?page=2')
+        assert client.get('/api/v1/titles/?page=4').status_code == 404
+
+    def test_small_estimate_counts_exactly(self, client, titles, estimate):
+        estimate(2)
+
+        response = client.get('/api/v1/titles/').json()
+        assert (response['count'], response['count_estimated']) == (
+            len(titles), False
+        )
+
+    def test_no_estimate_without_postgresql(self, titles):
+        from api.pagination import estimate_count
+        from reviews.models import Title
+
+        assert estimate_count(Title.objects.all()) is None
+
+
+@pytest.fixture
+def comments():
+    """12 комментариев, у которых даты публикации совпадают группами."""
+    from django.utils import timezone
+    from reviews.models import Comment, CustomUser, Review, Title
+
+    author = CustomUser.objects.create(username='author', email='a@ya.ru')
+    title = Title.objects.create(name='Произведение', year=2000)
+    review = Review.objects.create(title=title, author=author, text='Отзыв',
+                                   score=5)
+    start = timezone.now() - timezone.timedelta(days=1)
+    for number in range(12):
+        comment = Comment.objects.create(review=review, author=author,
+                                         text=f'Комментарий {number}')
+        Comment.objects.filter(pk=comment.pk).update(
+            pub_date=start + timezone.timedelta(minutes=number // 4)
+        )
+    return (
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        list(Comment.objects.order_by('-pub_date', '-id').values_list(
+            'id', flat=True
+        )),
+    )
+
+
+def page_ids(response):
+    return [comment['id'] for comment in response['results']]
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_walks_forward_and_back(self, client, comments):
+        url, expected = comments
+
+        pages = [client.get(f'{url}?pagination=cursor').json()]
+        while pages[-1]['next']:
+            pages.append(client.get(pages[-1]['next']).json())
+        assert [page_ids(page) for page in pages] == [
+            expected[:5], expected[5:10], expected[10:]
+        ], (
+            'Проверьте, что при совпадающих pub_date записи не теряются '
+            'и не повторяются на соседних страницах'
+        )
+        assert pages[0]['previous'] is None
+
+        backward = [pages[-1]]
+        while backward[-1]['previous']:
+            backward.append(client.get(backward[-1]['previous']).json())
+        assert [page_ids(page) for page in reversed(backward)] == [
+            page_ids(page) for page in pages
+        ]
+        assert backward[-1]['next'] is not None
+
+    @pytest.mark.parametrize('cursor', [
+        'не-base64',
+        'eHx5fHo=',  # x|y|z
+        'cXwyMDIwLTAxLTAxVDAwOjAwOjAwfDE=',  # q|2020-01-01T00:00:00|1
+        'bnxub3QtYS1kYXRlfDE=',  # n|not-a-date|1
+    ])
+    def test_malformed_cursor_is_404(self, client, comments, cursor):
+        url, _ = comments
+        response = client.get(f'{url}?cursor={cursor}')
+        assert response.status_code == 404
+        assert response.json() == {'detail': 'Неверный курсор.'}
@@ -0,0 +1,143 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def admin_client(client):
+    from reviews.models import CustomUser
+
+    admin = CustomUser.objects.create(
+        username='admin', email='admin@ya.ru', role='admin'
+    )
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {admin.token}'
+    return client
+
+
+def purge(batch_size=2):
+    output = StringIO()
+    call_command('purge_hidden', once=True, batch_size=batch_size,
+                 stdout=output)
+    return output.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestHiddenDeletion:
+
+    def test_title_is_hidden_then_purged(self, admin_client):
+        from reviews.models import Comment, CustomUser, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        admin = CustomUser.objects.get()
+        reviews = []
+        for number in range(3):
+            author = CustomUser.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru'
+            )
+            reviews.append(Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            ))
+        for _ in range(3):
+            Comment.objects.create(review=reviews[0], author=admin,
+                                   text='Комментарий')
+        url = f'/api/v1/titles/{title.id}/'
+
+        assert admin_client.delete(url).status_code == 204
+        assert admin_client.get(url).status_code == 404
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0
+        assert admin_client.get(f'{url}reviews/').status_code == 404
+        assert admin_client.get(
+            f'{url}reviews/{reviews[0].id}/comments/'
+        ).status_code == 404
+        assert Review.objects.count() == 3, (
+            'Проверьте, что DELETE только скрывает произведение'
+        )
+
+        output = purge()
+        assert 'удалено комментариев 2' in output
+        assert 'удалено отзывов 2' in output
+        assert 'осталось скрытых' in output
+        assert not Title.objects.exists()
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+
+    def test_hidden_review_leaves_rating(self, admin_client):
+        from reviews.models import CustomUser, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = admin_client.post(url, {'text': 'Отзыв', 'score': 9}).json()
+
+        assert admin_client.delete(
+            f'{url}{review["id"]}/'
+        ).status_code == 204
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (0, None), (
+            'Проверьте, что скрытый отзыв сразу не учитывается в рейтинге'
+        )
+        assert admin_client.get(url).json()['count'] == 0
+        assert admin_client.post(
+            url, {'text': 'Новый отзыв', 'score': 4}
+        ).status_code == 201, (
+            'Проверьте, что скрытый отзыв не мешает написать новый'
+        )
+
+        purge()
+        title.refresh_from_db()
+        assert Review.objects.get().author == CustomUser.objects.get()
+        assert (title.rating_count, title.rating) == (1, 4)
+
+    def test_category_is_released_in_chunks(self, admin_client):
+        from reviews.models import Category, Title
+
+        category = Category.objects.create(name='Фильмы', slug='films')
+        titles = [
+            Title.objects.create(name=f'Фильм {number}', year=2000,
+                                 category=category)
+            for number in range(3)
+        ]
+
+        assert admin_client.delete(
+            '/api/v1/categories/films/'
+        ).status_code == 204
+        assert admin_client.get('/api/v1/categories/').json()['count'] == 0
+        response = admin_client.get('/api/v1/titles/').json()
+        assert response['count'] == 3
+        assert {title['category'] for title in response['results']} == {
+            None
+        }
+        assert admin_client.get(
+            '/api/v1/titles/?category=films'
+        ).json()['count'] == 0
+
+        output = purge()
+        assert 'отвязано произведений 2' in output
+        assert not Category.objects.exists()
+        assert not Title.objects.filter(category__isnull=False).exists()
+        assert Title.objects.count() == len(titles)
+
+    def test_rebuilds_ignore_hidden_reviews(self):
+        from reviews.leaderboards import trending_score
+        from reviews.models import CustomUser, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        for number, score in enumerate((10, 2)):
+            author = CustomUser.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru'
+            )
+            review = Review.objects.create(title=title, author=author,
+                                           text='Отзыв', score=score)
+        review.hide()
+
+        call_command('reconcile_ratings', stdout=None)
+        call_command('refresh_leaderboards', stdout=None)
+
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 1, 10
+        ), 'Проверьте, что сверка рейтингов не учитывает скрытые отзывы'
+        assert (title.score_count_10, title.score_count_2) == (1, 0)
+        assert trending_score(
+            title.leaderboard.trending
+        ) == pytest.approx(1, abs=0.01)
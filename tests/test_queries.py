@@ -0,0 +1,143 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def create_titles(count):
+    from reviews.models import Category, Genre, Title
+
+    start = Title.objects.count()
+    for number in range(start, start + count):
+        category = Category.objects.create(
+            name=f'Категория {number}', slug=f'category-{number}'
+        )
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        title.genre.set([
+            Genre.objects.create(
+                name=f'Жанр {number}-{index}', slug=f'genre-{number}-{index}'
+            )
+            for index in range(2)
+        ])
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleQueries:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/?genre=genre-0-0,genre-1-0,genre-1-1',
+        '/api/v1/titles/?category=category-0,category-1&name=Произведение',
+        '/api/v1/titles/?year_min=1990&year_max=2010',
+    ])
+    def test_title_list_query_count(self, client, url):
+        create_titles(1)
+        single_page = count_queries(client, url)
+        create_titles(4)
+        full_page = count_queries(client, url)
+
+        assert single_page == full_page, (
+            f'Проверьте, что число SQL-запросов к `{url}` не зависит от '
+            f'количества произведений на странице: {single_page} для одного '
+            f'и {full_page} для пяти'
+        )
+
+    def test_title_detail_query_count(self, client):
+        from reviews.models import Title
+
+        create_titles(1)
+        title = Title.objects.get()
+
+        # Третий запрос читает updated_at для валидаторов ETag.
+        assert count_queries(client, f'/api/v1/titles/{title.id}/') <= 3, (
+            'Проверьте, что произведение с категорией и жанрами '
+            'загружается не более чем тремя SQL-запросами'
+        )
+
+
+
+def create_reviews(title, count):
+    from reviews.models import Comment, CustomUser, Review
+
+    first = Review.objects.filter(title=title).order_by('pk').first()
+    start = CustomUser.objects.count()
+    for number in range(start, start + count):
+        author = CustomUser.objects.create(
+            username=f'user-{number}', email=f'user-{number}@ya.ru'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {number}', score=5
+        )
+        Comment.objects.create(
+            review=first or review, author=author,
+            text=f'Комментарий {number}'
+        )
+
+
+@pytest.mark.django_db
+class TestReviewQueries:
+
+    @pytest.mark.parametrize('path', [
+        'reviews/',
+        'reviews/?pagination=cursor',
+        'reviews/{review.id}/comments/',
+        'reviews/{review.id}/comments/?review=id',
+    ])
+    def test_list_query_count(self, client, path):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        create_reviews(title, 1)
+        review = Review.objects.get()
+        url = f'/api/v1/titles/{title.id}/' + path.format(review=review)
+        single_page = count_queries(client, url)
+        create_reviews(title, 4)
+        full_page = count_queries(client, url)
+
+        assert single_page == full_page, (
+            f'Проверьте, что число SQL-запросов к `{url}` не зависит от '
+            f'количества авторов на странице: {single_page} для одного '
+            f'и {full_page} для пяти'
+        )
+
+    def test_detail_query_count(self, client):
+        from reviews.models import Comment, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        create_reviews(title, 1)
+        review = Review.objects.get()
+        comment = Comment.objects.get()
+        base = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+
+        # Запрос updated_at для ETag, затем сам объект с автором.
+        assert count_queries(client, base) <= 3
+        assert count_queries(
+            client, f'{base}comments/{comment.id}/'
+        ) <= 3, (
+            'Проверьте, что комментарий загружается вместе с автором'
+        )
+
+    def test_review_id_instead_of_text(self, client):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        create_reviews(title, 1)
+        review = Review.objects.get()
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+
+        assert client.get(url).json()['results'][0]['review'] == review.text
+        assert client.get(
+            f'{url}?review=id'
+        ).json()['results'][0]['review'] == review.id, (
+            'Проверьте, что с ?review=id комментарий содержит id отзыва'
+        )
@@ -0,0 +1,112 @@
+import pytest
+from django.db import connections
+
+
+class QueryLog:
+    """Запоминает, через какие соединения шли SQL-запросы."""
+
+    def __init__(self):
+        self.aliases = []
+
+    def wrapper(self, alias):
+        def execute(execute, sql, params, many, context):
+            self.aliases.append(alias)
+            return execute(sql, params, many, context)
+        return execute
+
+    def __enter__(self):
+        self.contexts = [
+            connections[alias].execute_wrapper(self.wrapper(alias))
+            for alias in ('default', 'replica')
+        ]
+        for context in self.contexts:
+            context.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        for context in reversed(self.contexts):
+            context.__exit__(*args)
+
+
+@pytest.fixture
+def replicas(settings):
+    from django.core.cache import caches
+
+    settings.REPLICA_DATABASES = ['replica']
+    settings.REPLICA_STICKY_SECONDS = 0
+    caches[settings.API_CACHE_ALIAS].clear()
+    yield
+    caches[settings.API_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def admin_client(client):
+    from reviews.models import CustomUser
+
+    admin = CustomUser.objects.create(
+        username='admin', email='admin@ya.ru', role='admin'
+    )
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {admin.token}'
+    return client
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica(self, client, replicas):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.pk}/',
+                    f'/api/v1/titles/{title.pk}/reviews/'):
+            with QueryLog() as log:
+                response = client.get(url)
+            assert response.status_code == 200
+            assert log.aliases and set(log.aliases) == {'replica'}, (
+                f'Проверьте, что GET-запрос к `{url}` читает с реплики'
+            )
+
+    def test_writes_and_auth_stay_on_primary(self, admin_client, replicas):
+        with QueryLog() as log:
+            response = admin_client.post(
+                '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'}
+            )
+            admin_client.post('/api/v1/auth/signup/', {
+                'username': 'reader', 'email': 'reader@ya.ru'
+            })
+        assert response.status_code == 201
+        assert 'replica' not in log.aliases, (
+            'Проверьте, что запись и регистрация идут в основную базу'
+        )
+
+    def test_read_your_writes(self, settings, admin_client, replicas):
+        from api.cache import VERSION_KEY
+        from django.core.cache import caches
+        from django.test import Client
+
+        settings.REPLICA_STICKY_SECONDS = 60
+        admin_client.post(
+            '/api/v1/categories/', {'name': 'Книги', 'slug': 'books'}
+        )
+        # Жанры давно не менялись: их можно читать с реплики.
+        caches[settings.API_CACHE_ALIAS].set(
+            VERSION_KEY.format(group='genres'), 1, None
+        )
+
+        with QueryLog() as log:
+            # Другая строка запроса, чтобы ответ не взялся из кэша.
+            admin_client.get('/api/v1/genres/?search=Драма')
+        assert set(log.aliases) == {'default'}, (
+            'Проверьте, что после изменения данных пользователь читает '
+            'из основной базы'
+        )
+        anonymous = Client()
+        with QueryLog() as log:
+            anonymous.get('/api/v1/categories/')
+        assert set(log.aliases) == {'default'}, (
+            'Проверьте, что недавно изменённые данные читаются из основной '
+            'базы'
+        )
+        with QueryLog() as log:
+            anonymous.get('/api/v1/genres/')
+        assert set(log.aliases) == {'replica'}
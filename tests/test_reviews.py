@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def author_client(client):
+    from reviews.models import CustomUser
+
+    author = CustomUser.objects.create(username='author', email='a@ya.ru')
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {author.token}'
+    return client
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_duplicate_review_is_400(self, author_client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        first = author_client.post(url, {'text': 'Первый', 'score': 8})
+        second = author_client.post(url, {'text': 'Второй', 'score': 2})
+
+        assert first.status_code == 201
+        assert second.status_code == 400, (
+            'Проверьте, что повторный отзыв отклоняется статусом 400'
+        )
+        assert second.json() == {
+            'non_field_errors': ['Можно оставлять не более одного отзыва!']
+        }
+        title.refresh_from_db()
+        assert title.reviews.count() == 1
+        assert (title.rating_count, title.rating) == (1, 8), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    def test_create_queries(self, author_client):
+        from reviews.leaderboards import mean_score
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        # Средняя оценка каталога для подборок кэшируется на час.
+        mean_score()
+        with CaptureQueriesContext(connection) as context:
+            response = author_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 5}
+            )
+
+        assert response.status_code == 201
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        assert sum('FROM "reviews_title"' in sql for sql in selects) == 1, (
+            'Проверьте, что произведение читается один раз за запрос'
+        )
+        assert not any('FROM "reviews_review"' in sql for sql in selects), (
+            'Проверьте, что уникальность отзыва проверяет ограничение '
+            'unique_review, а не отдельный SELECT'
+        )
+
+    def test_comment_create(self, author_client):
+        from reviews.models import CustomUser, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=CustomUser.objects.get(), text='Отзыв',
+            score=5
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+
+        response = author_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        assert response.json()['review'] == 'Отзыв'
+        assert author_client.post(
+            f'/api/v1/titles/{title.id}/reviews/{review.id + 1}/comments/',
+            {'text': 'Комментарий'}
+        ).status_code == 404
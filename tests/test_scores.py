@@ -0,0 +1,126 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.fixture
+def users():
+    from reviews.models import CustomUser
+
+    return [
+        CustomUser.objects.create(username=f'user{number}',
+                                  email=f'user{number}@ya.ru')
+        for number in range(3)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestScoreHistogram:
+
+    def test_counters_follow_reviews(self, client, users):
+        from reviews.models import Review, Title
+
+        first = Title.objects.create(name='Первое', year=2000)
+        second = Title.objects.create(name='Второе', year=2000)
+        reviews = [
+            Review.objects.create(title=first, author=user, text='Отзыв',
+                                  score=score)
+            for user, score in zip(users, (10, 10, 3))
+        ]
+        reviews[2].score = 7
+        reviews[2].save()
+        reviews[1].title = second
+        reviews[1].save()
+        reviews[0].delete()
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/v1/titles/{first.id}/')
+        assert response.status_code == 200
+        assert response.json()['scores'] == histogram(s7=1)
+        assert response.json()['reviews_count'] == 1
+        assert not any(
+            'reviews_review' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что распределение оценок не читает таблицу отзывов'
+        assert client.get(
+            f'/api/v1/titles/{second.id}/'
+        ).json()['scores'] == histogram(s10=1)
+
+    def test_title_update_keeps_rating(self, client, monkeypatch, users):
+        from api.views import TitleViewSet
+        from reviews.models import CustomUser, Review, Title
+
+        admin = CustomUser.objects.create(
+            username='admin', email='admin@ya.ru', role='admin'
+        )
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {admin.token}'
+        title = Title.objects.create(name='Произведение', year=2000)
+        get_object = TitleViewSet.get_object
+
+        def get_object_then_review(view):
+            # Отзыв появляется, пока вьюсет держит загруженный экземпляр.
+            instance = get_object(view)
+            Review.objects.create(title=title, author=users[0],
+                                  text='Отзыв', score=9)
+            return instance
+
+        monkeypatch.setattr(TitleViewSet, 'get_object',
+                            get_object_then_review)
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/', {'name': 'Новое название'},
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+
+        title.refresh_from_db()
+        assert title.name == 'Новое название'
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            9, 1, 9
+        ), 'Проверьте, что изменение произведения не затирает его рейтинг'
+        assert title.score_count_9 == 1
+
+    def test_batch(self, client, users):
+        from reviews.models import Review, Title
+
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(3)
+        ]
+        Review.objects.create(title=titles[1], author=users[0],
+                              text='Отзыв', score=4)
+
+        ids = ','.join(str(title.id) for title in titles) + ',100500'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/v1/titles/scores/?ids={ids}')
+        assert response.status_code == 200
+        assert response.json() == [
+            {'id': title.id, 'reviews_count': count, 'scores': scores}
+            for title, count, scores in zip(
+                titles, (0, 1, 0), (histogram(), histogram(s4=1), histogram())
+            )
+        ]
+        assert len(context.captured_queries) == 1
+
+        too_many = ','.join(str(number) for number in range(1, 102))
+        for query in ('', 'ids=', 'ids=1,x', f'ids={too_many}'):
+            assert client.get(
+                f'/api/v1/titles/scores/?{query}'
+            ).status_code == 400
+
+    def test_reconcile_fixes_histogram(self, users):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=users[0], text='Отзыв',
+                              score=6)
+        Title.objects.update(score_count_6=0, score_count_2=5)
+
+        call_command('reconcile_ratings', stdout=None)
+
+        title.refresh_from_db()
+        assert (title.score_count_2, title.score_count_6) == (0, 1)
@@ -0,0 +1,99 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache(settings):
+    caches[settings.API_CACHE_ALIAS].clear()
+    yield
+    caches[settings.API_CACHE_ALIAS].clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleSearch:
+
+    url = '/api/v1/titles/'
+
+    def search(self, client, query):
+        return [
+            title['name']
+            for title in client.get(f'{self.url}?{query}').json()['results']
+        ]
+
+    def test_search_by_name_and_description(self, client):
+        from reviews.models import Title
+
+        Title.objects.create(
+            name='Война и мир', year=1869, description='Роман-эпопея'
+        )
+        Title.objects.create(
+            name='Тишина', year=1900, description='Книга о войне'
+        )
+        Title.objects.create(name='Другое', year=1900)
+
+        assert self.search(client, 'search=войн') == [
+            'Война и мир', 'Тишина'
+        ], (
+            'Проверьте, что поиск находит произведения по префиксу слова '
+            'в названии и описании и ставит совпадение в названии выше'
+        )
+        assert self.search(client, 'search=войн&year=1900') == ['Тишина'], (
+            'Проверьте, что фильтры применяются поверх результатов поиска'
+        )
+
+    def test_index_follows_changes(self, client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Мир', year=1900)
+        title.name = 'Тишина'
+        title.save()
+        assert self.search(client, 'search=Тиш') == ['Тишина']
+        assert self.search(client, 'search=Мир') == []
+
+        title.delete()
+        assert self.search(client, 'search=Тиш') == [], (
+            'Проверьте, что удалённое произведение пропадает из поиска'
+        )
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    url = '/api/v1/titles/'
+
+    def test_genre_and_category_exact_match(self, client):
+        from reviews.models import Category, Genre, Title
+
+        books = Category.objects.create(name='Книги', slug='books')
+        Category.objects.create(name='Книги и фильмы', slug='books-movies')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        Genre.objects.create(name='Драмеди', slug='drama-comedy')
+        title = Title.objects.create(name='Первое', year=1990, category=books)
+        title.genre.set([drama, comedy])
+        Title.objects.create(name='Второе', year=2010)
+
+        response = client.get(f'{self.url}?genre=drama,comedy').json()
+        assert [item['id'] for item in response['results']] == [title.id], (
+            'Проверьте, что фильтр по нескольким жанрам не дублирует '
+            'произведение, подходящее под оба жанра'
+        )
+        assert response['count'] == 1
+        assert client.get(f'{self.url}?genre=dram').json()['count'] == 0, (
+            'Проверьте, что фильтр по жанру сравнивает слаг целиком'
+        )
+        assert client.get(f'{self.url}?category=books').json()['count'] == 1
+        assert client.get(f'{self.url}?genre=unknown').json()['count'] == 0
+
+    def test_year_range(self, client):
+        from reviews.models import Title
+
+        for year in (1980, 1990, 2000, 2010):
+            Title.objects.create(name=f'Произведение {year}', year=year)
+
+        response = client.get(f'{self.url}?year_min=1990&year_max=2000')
+        assert sorted(
+            item['year'] for item in response.json()['results']
+        ) == [1990, 2000], (
+            'Проверьте, что year_min и year_max ограничивают год включительно'
+        )